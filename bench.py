@@ -0,0 +1,234 @@
+# pyright: reportAny=false, reportUnusedCallResult=false
+"""Benchmarks for the lip sync pipeline.
+
+Usage:
+    python bench.py preprocess audio.wav
+    python bench.py words audio.json
+    python bench.py pinyin audio.json
+    python bench.py phonemize audio.json --max-jobs 8
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import wave
+from pathlib import Path
+
+import main
+
+
+def bench_preprocess(args: argparse.Namespace) -> None:
+    """Time the preprocessing stage, then compare Rhubarb on the original
+    WAV against the preprocessed one."""
+    viseme_map = main.read_viseme_map(args.viseme_map)
+    tmp_dir = Path(tempfile.mkdtemp())
+    mono_wav = str(tmp_dir / "mono.wav")
+    outputs: list[str] = []
+
+    try:
+        start = time.perf_counter()
+        if not main.preprocess_audio(args.audio_file, mono_wav):
+            print(f"{args.audio_file} needs no preprocessing.")
+            return
+        elapsed = time.perf_counter() - start
+        with wave.open(args.audio_file, "rb") as f:
+            duration = f.getnframes() / f.getframerate()
+        speed = duration / elapsed
+        print(f"{'preprocess':>14}: {elapsed:.3f}s ({speed:.0f}x real time)")
+
+        for label, preprocess in (("original", False), ("preprocessed", True)):
+            tsv = str(tmp_dir / f"{label}.tsv")
+            start = time.perf_counter()
+            rhubarb_input = args.audio_file
+            if preprocess and main.preprocess_audio(args.audio_file, mono_wav):
+                rhubarb_input = mono_wav
+            main.run_rhubarb(rhubarb_input, tsv)
+            elapsed = time.perf_counter() - start
+            outputs.append(main.process_rhubarb_output(tsv, viseme_map))
+            print(f"{label:>14}: {elapsed:.3f}s")
+    finally:
+        for file in tmp_dir.iterdir():
+            file.unlink()
+        os.rmdir(tmp_dir)
+
+    print(f"{'equivalent':>14}: {outputs[0] == outputs[1]}")
+
+
+def make_whisper_json(words: int, seed: int = 0) -> bytes:
+    """Build a Whisper-like JSON document with all the fields Whisper writes."""
+    rng = random.Random(seed)
+    segments = []
+    t = 0.0
+    for start in range(0, words, 20):
+        segment_words = []
+        for _ in range(min(20, words - start)):
+            end = t + rng.uniform(0.1, 0.6)
+            segment_words.append(
+                {
+                    "word": " word",
+                    "start": round(t, 2),
+                    "end": round(end, 2),
+                    "probability": rng.random(),
+                }
+            )
+            t = end + rng.uniform(0, 0.3)
+        segments.append(
+            {
+                "id": len(segments),
+                "seek": 0,
+                "start": segment_words[0]["start"],
+                "end": segment_words[-1]["end"],
+                "text": " word" * len(segment_words),
+                "tokens": [rng.randrange(50000) for _ in range(len(segment_words) * 2)],
+                "temperature": 0.0,
+                "avg_logprob": -rng.random(),
+                "compression_ratio": rng.uniform(1, 2),
+                "no_speech_prob": rng.random(),
+                "words": segment_words,
+            }
+        )
+
+    return json.dumps({"text": "", "segments": segments, "language": "en"}).encode()
+
+
+def bench_words(args: argparse.Namespace) -> None:
+    """Compare Whisper JSON loaders."""
+    if args.input_file:
+        with open(args.input_file, "rb") as f:
+            raw = f.read()
+    else:
+        raw = make_whisper_json(args.words)
+
+    def stdlib_loader(raw: bytes) -> list[main.Word]:
+        audio_data = json.loads(raw)
+        return [
+            main.Word(word["word"], word["start"], word["end"])
+            for segment in audio_data["segments"]
+            for word in segment["words"]
+        ]
+
+    loaders = {"json": stdlib_loader, "decode_words": main.decode_words}
+    if main.orjson is not None:
+        loaders["orjson"] = main.decode_words_json
+
+    print(f"{len(raw) / 1e6:.1f} MB, msgspec: {main.msgspec is not None}")
+    results = {}
+    for name, loader in loaders.items():
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            results[name] = loader(raw)
+            best = min(best, time.perf_counter() - start)
+        print(f"{name:>14}: {best:.3f}s")
+
+    reference = results["json"]
+    print(f"{'equivalent':>14}: {all(r == reference for r in results.values())}")
+
+
+def bench_pinyin(args: argparse.Namespace) -> None:
+    """Compare whole-transcript and per-word pinyin conversion."""
+    words, words_only_text = main.get_words_data(args.input_file)
+    starts = main.phrase_starts(words)
+    script: list[str] = []
+    script_starts: list[int] = []
+    while sum(map(len, script)) < args.chars:
+        script_starts.extend(len(script) + start for start in starts)
+        script.extend(words_only_text)
+
+    print(f"{len(script)} words, {sum(map(len, script))} characters")
+    main.get_pinyins_separately(words_only_text)  # Load pypinyin's dictionaries
+    results = {}
+    for name, convert in (
+        ("per word", main.get_pinyins_separately),
+        ("whole", lambda script: main.get_pinyins_per_word(script, script_starts)),
+    ):
+        results[name], elapsed = timed(convert, script)
+        print(f"{name:>14}: {elapsed:.3f}s")
+
+    same_structure = all(
+        len(a) == len(b) for a, b in zip(results["per word"], results["whole"])
+    )
+    print(f"{'same structure':>14}: {same_structure}")
+
+
+def bench_phonemize(args: argparse.Namespace) -> None:
+    """espeak phonemization time with 1 to N phonemizer processes."""
+    _, words_only_text = main.get_words_data(args.input_file)
+    script: list[str] = []
+    while len(script) < args.words:
+        script.extend(words_only_text)
+    script = script[: args.words]
+
+    print(f"{len(script)} words, language {args.language}")
+    results = {}
+    baseline = None
+    for jobs in range(1, args.max_jobs + 1):
+        main.phonemize_jobs = jobs
+        results[jobs], elapsed = timed(main._phonemize, script, args.language)
+        baseline = baseline or elapsed
+        print(f"{jobs:>3} jobs: {elapsed:.3f}s  {baseline / elapsed:.2f}x")
+
+    reference = results[1]
+    aligned = all(len(r) == len(script) for r in results.values())
+    print(f"aligned: {aligned}")
+    print(f"equivalent: {all(r == reference for r in results.values())}")
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def setup_argparse() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmarks for the lip sync script.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    preprocess = subparsers.add_parser(
+        "preprocess", help="Rhubarb wall time with and without audio preprocessing."
+    )
+    preprocess.add_argument("audio_file", help="The path to a WAV file.")
+    preprocess.add_argument(
+        "--viseme_map", "-m", default="rhubarb_map.json", help="Rhubarb viseme map."
+    )
+    preprocess.set_defaults(func=bench_preprocess)
+
+    words = subparsers.add_parser("words", help="Whisper JSON loading time.")
+    words.add_argument(
+        "input_file", nargs="?", help="Whisper JSON file. Generated if omitted."
+    )
+    words.add_argument(
+        "--words", type=int, default=500000, help="Words in the generated file."
+    )
+    words.add_argument("--repeat", type=int, default=3)
+    words.set_defaults(func=bench_words)
+
+    pinyin = subparsers.add_parser("pinyin", help="Pinyin conversion time.")
+    pinyin.add_argument("input_file", help="Chinese Whisper JSON file, repeated.")
+    pinyin.add_argument(
+        "--chars", type=int, default=100000, help="Length of the script."
+    )
+    pinyin.set_defaults(func=bench_pinyin)
+
+    phonemize = subparsers.add_parser(
+        "phonemize", help="espeak phonemization time by number of processes."
+    )
+    phonemize.add_argument("input_file", help="Whisper JSON file, repeated.")
+    phonemize.add_argument(
+        "--words", type=int, default=20000, help="Length of the script."
+    )
+    phonemize.add_argument("--language", "-l", default="en")
+    phonemize.add_argument(
+        "--max-jobs", type=int, default=os.cpu_count() or 1, help="Largest job count."
+    )
+    phonemize.set_defaults(func=bench_phonemize)
+
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = setup_argparse()
+    args.func(args)
@@ -0,0 +1,280 @@
+# pyright: reportAny=false, reportUnusedCallResult=false
+"""Incremental import of a frame data file onto a Blender fcurve.
+
+Re-importing a regenerated file only touches what changed: the file is
+diffed against the fcurve's keyframe points, runs that match are left
+alone (manual interpolation and handle edits included), and each changed
+run is moved in place, added or removed in bulk with foreach_get and
+foreach_set.
+
+In Blender, open this file in the Text Editor and run it. The 3D view
+sidebar gets a "Lip Sync" tab with the Update Keyframes panel.
+
+`sync_fcurve` only uses `fcurve.keyframe_points` (len, indexing,
+`foreach_get`, `foreach_set`, `add`, `remove`) and `fcurve.update()`, so
+it runs without Blender against any object with that interface.
+"""
+
+import difflib
+import os
+import re
+import time
+from array import array
+from dataclasses import dataclass, field
+from typing import Any
+
+try:
+    import bpy  # pyrefly: ignore[missing-import]
+except ImportError:
+    bpy = None
+
+CONSTANT = 0  # Keyframe.interpolation enum value of 'CONSTANT'
+
+
+@dataclass
+class SyncResult:
+    kept: int = 0
+    moved: int = 0
+    added: int = 0
+    removed: int = 0
+    # (first frame, last frame) of each changed run
+    ranges: list[tuple[int, int]] = field(default_factory=list)
+
+    def __str__(self) -> str:
+        return (
+            f"kept {self.kept}, moved {self.moved}, added {self.added}, "
+            f"removed {self.removed} keys in {len(self.ranges)} changed ranges"
+        )
+
+
+def read_frame_data(file_path: str, offset: int = 0) -> list[tuple[int, int]]:
+    """(frame + offset, value) keyframes from a frame data file, sorted by
+    frame. A later line for the same frame wins, as with keyframe_insert."""
+    keyframes: dict[int, int] = {}
+    with open(file_path, "r", encoding="utf-8") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) < 2:
+                continue
+            try:
+                keyframes[int(parts[0]) + offset] = int(parts[1])
+            except ValueError:
+                print(f"Skipping invalid line: {line.strip()}")
+
+    return sorted(keyframes.items())
+
+
+def sync_fcurve(fcurve: Any, keyframes: list[tuple[int, int]]) -> SyncResult:
+    """Make `fcurve` hold exactly `keyframes` with constant interpolation,
+    touching only the points in runs that differ from them.
+
+    Points of a changed run are reused for its new keys first, so a run
+    whose keys only shifted costs one foreach_set. Only the points left
+    over are removed one by one; new keys are added in a single call.
+    """
+    points = fcurve.keyframe_points
+    n = len(points)
+    co = array("f", bytes(8 * n))
+    points.foreach_get("co", co)
+    existing = list(zip(co[0::2], co[1::2]))
+    target = [(float(frame), float(value)) for frame, value in keyframes]
+
+    result = SyncResult()
+    stale: list[int] = []  # Indices of points to reuse or remove
+    fresh: list[tuple[float, float]] = []  # Keys to move a point to, or add
+    matcher = difflib.SequenceMatcher(None, existing, target, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            result.kept += i2 - i1
+            continue
+        stale.extend(range(i1, i2))
+        fresh.extend(target[j1:j2])
+        frames = [existing[i][0] for i in range(i1, i2)] + [
+            target[j][0] for j in range(j1, j2)
+        ]
+        result.ranges.append((round(min(frames)), round(max(frames))))
+
+    if not stale and not fresh:
+        return result
+
+    interpolation = array("i", bytes(4 * n))
+    left = array("f", bytes(8 * n))
+    right = array("f", bytes(8 * n))
+    points.foreach_get("interpolation", interpolation)
+    points.foreach_get("handle_left", left)
+    points.foreach_get("handle_right", right)
+
+    result.moved = min(len(stale), len(fresh))
+    for i, key in zip(stale, fresh):
+        for values in (co, left, right):
+            values[2 * i : 2 * i + 2] = array("f", key)
+        interpolation[i] = CONSTANT
+
+    surplus = stale[result.moved :]
+    if surplus:
+        # From the end, so the indices still to remove stay valid
+        for i in reversed(surplus):
+            points.remove(points[i], fast=True)
+        gone = set(surplus)
+        rows = [i for i in range(n) if i not in gone]
+        co, left, right = (
+            array("f", (v for i in rows for v in (values[2 * i], values[2 * i + 1])))
+            for values in (co, left, right)
+        )
+        interpolation = array("i", (interpolation[i] for i in rows))
+        result.removed = len(surplus)
+
+    added = fresh[result.moved :]
+    if added:
+        points.add(len(added))
+        for values in (co, left, right):
+            values.extend(v for key in added for v in key)
+        interpolation.extend([CONSTANT] * len(added))
+        result.added = len(added)
+
+    if result.moved or result.added:
+        points.foreach_set("co", co)
+        points.foreach_set("handle_left", left)
+        points.foreach_set("handle_right", right)
+        points.foreach_set("interpolation", interpolation)
+    fcurve.update()  # Sort the points and recalculate handles
+
+    return result
+
+
+def find_fcurve(full_rna_path: str, first_frame: int) -> Any:
+    """The fcurve animating a property given by its full data path, e.g.
+    `bpy.data.objects["Face"].location[0]`. Keys the property once at
+    `first_frame` when it isn't animated yet."""
+    if "." not in full_rna_path:
+        raise ValueError(f"Not a full data path: {full_rna_path}")
+    parent_path, prop_name = full_rna_path.rsplit(".", 1)
+    try:
+        parent = eval(parent_path, {"bpy": bpy})
+    except Exception as e:
+        raise ValueError(f"Can't resolve {parent_path}: {e}")
+
+    index = 0
+    match = re.match(r"(.+)\[(\d+)\]$", prop_name)
+    if match:
+        prop_name, index = match.group(1), int(match.group(2))
+
+    # Properties of modifiers, nodes etc. are keyed on the ID that owns them
+    owner, data_path = parent, prop_name
+    if getattr(parent, "id_data", parent) != parent:
+        owner = parent.id_data
+        prefix = parent.path_from_id()
+        if prefix:
+            data_path = f"{prefix}.{prop_name}"
+
+    def lookup() -> Any:
+        if owner.animation_data is None or owner.animation_data.action is None:
+            return None
+        return owner.animation_data.action.fcurves.find(data_path, index=index)
+
+    fcurve = lookup()
+    if fcurve is None:
+        owner.keyframe_insert(data_path=data_path, index=index, frame=first_frame)
+        fcurve = lookup()
+    if fcurve is None:
+        raise ValueError(f"Can't keyframe {full_rna_path}.")
+
+    return fcurve
+
+
+def apply_keyframes(file_path: str, full_rna_path: str, offset: int) -> str:
+    if not file_path or not os.path.exists(file_path):
+        raise ValueError(f"No frame data file at {file_path!r}.")
+
+    start = time.perf_counter()
+    keyframes = read_frame_data(file_path, offset)
+    if not keyframes:
+        raise ValueError(f"No keyframes in {file_path}.")
+    result = sync_fcurve(find_fcurve(full_rna_path, keyframes[0][0]), keyframes)
+    elapsed = time.perf_counter() - start
+    return f"Updated keyframes: {result} ({elapsed * 1000:.0f}ms)."
+
+
+if bpy is not None:
+
+    class LipSyncImportProperties(bpy.types.PropertyGroup):
+        # Blender reads these annotations as property definitions
+        target_rna_path: bpy.props.StringProperty(  # pyrefly: ignore[invalid-annotation]
+            name="RNA Path",
+            description="Full data path of the property to keyframe",
+            default="bpy.context.object.location[0]",
+        )
+        file_path: bpy.props.StringProperty(  # pyrefly: ignore[invalid-annotation]
+            name="Data File",
+            description="Frame data file written by main.py",
+            subtype="FILE_PATH",
+        )
+        frame_offset: bpy.props.IntProperty(  # pyrefly: ignore[invalid-annotation]
+            name="Frame Offset", description="Added to every frame", default=0
+        )
+
+    class LIPSYNC_OT_update_keyframes(bpy.types.Operator):
+        """Update the property's keys from the file, touching only changed ones"""
+
+        bl_idname = "lip_sync.update_keyframes"
+        bl_label = "Update Keyframes"
+        bl_options = {"REGISTER", "UNDO"}
+
+        def execute(self, context: Any) -> set[str]:
+            props = context.scene.lip_sync_import
+            try:
+                message = apply_keyframes(
+                    bpy.path.abspath(props.file_path),
+                    props.target_rna_path,
+                    props.frame_offset,
+                )
+            except ValueError as e:
+                self.report({"ERROR"}, str(e))
+                return {"CANCELLED"}
+
+            context.view_layer.update()
+            self.report({"INFO"}, message)
+            return {"FINISHED"}
+
+    class LIPSYNC_PT_update_keyframes(bpy.types.Panel):
+        bl_label = "Update Keyframes"
+        bl_idname = "LIPSYNC_PT_update_keyframes"
+        bl_space_type = "VIEW_3D"
+        bl_region_type = "UI"
+        bl_category = "Lip Sync"
+
+        def draw(self, context: Any) -> None:
+            props = context.scene.lip_sync_import
+            layout = self.layout
+            layout.prop(props, "target_rna_path")
+            layout.prop(props, "frame_offset")
+            layout.prop(props, "file_path")
+            layout.operator("lip_sync.update_keyframes", icon="KEY_HLT")
+
+    classes = (
+        LipSyncImportProperties,
+        LIPSYNC_OT_update_keyframes,
+        LIPSYNC_PT_update_keyframes,
+    )
+
+
+def register() -> None:
+    if bpy is None:
+        raise RuntimeError("Run this inside Blender.")
+    for cls in classes:
+        bpy.utils.register_class(cls)
+    bpy.types.Scene.lip_sync_import = bpy.props.PointerProperty(
+        type=LipSyncImportProperties
+    )
+
+
+def unregister() -> None:
+    if bpy is None:
+        return
+    for cls in reversed(classes):
+        bpy.utils.unregister_class(cls)
+    del bpy.types.Scene.lip_sync_import
+
+
+if __name__ == "__main__":
+    register()
@@ -0,0 +1,163 @@
+# pyright: reportAny=false, reportUnusedCallResult=false
+"""Check blender_import.sync_fcurve against a stub fcurve, without Blender.
+
+Every case keys a random track with Bezier interpolation, standing in for
+manual edits in Blender, then edits the track at random (replaced runs,
+new values, whole new tracks) and syncs the fcurve to it. Afterwards the
+fcurve's keys must equal the edited track, exactly the kept points must
+be untouched and still Bezier, and syncing again must write nothing.
+
+Usage:
+    python check_blender_import.py
+    python check_blender_import.py --cases 1000 --seed 7
+"""
+
+import argparse
+import random
+import sys
+from array import array
+from typing import Any
+
+from blender_import import CONSTANT, sync_fcurve
+
+BEZIER = 2  # Keyframe.interpolation enum value of 'BEZIER'
+
+
+class StubPoint:
+    def __init__(self, frame: float = 0.0, value: float = 0.0):
+        self.co = [frame, value]
+        self.handle_left = [frame, value]
+        self.handle_right = [frame, value]
+        self.interpolation = BEZIER
+        self.touched = False
+
+
+class StubPoints(list[StubPoint]):
+    """The parts of bpy's FCurveKeyframePoints that sync_fcurve uses."""
+
+    def __init__(self, points: list[StubPoint]):
+        super().__init__(points)
+        self.writes = 0
+
+    def foreach_get(self, attr: str, buffer: array) -> None:
+        values: list[Any] = []
+        for point in self:
+            value = getattr(point, attr)
+            values.extend(value if isinstance(value, list) else [value])
+        if len(values) != len(buffer):
+            raise ValueError(f"foreach_get {attr}: {len(buffer)} for {len(values)}")
+        buffer[:] = array(buffer.typecode, values)
+
+    def foreach_set(self, attr: str, buffer: array) -> None:
+        self.writes += 1
+        width = 1 if attr == "interpolation" else 2
+        if len(buffer) != width * len(self):
+            raise ValueError(f"foreach_set {attr}: {len(buffer)} for {len(self)}")
+        for i, point in enumerate(self):
+            value = buffer[i] if width == 1 else list(buffer[2 * i : 2 * i + 2])
+            if getattr(point, attr) != value:
+                point.touched = True
+                setattr(point, attr, value)
+
+    def add(self, count: int) -> None:
+        self.extend(StubPoint() for _ in range(count))
+
+    def remove(self, point: StubPoint, fast: bool = False) -> None:
+        for i, other in enumerate(self):
+            if other is point:
+                del self[i]
+                return
+        raise ValueError("Point is not on this fcurve.")
+
+
+class StubFCurve:
+    def __init__(self, keyframes: list[tuple[int, int]]):
+        self.keyframe_points = StubPoints(
+            [StubPoint(float(frame), float(value)) for frame, value in keyframes]
+        )
+
+    def update(self) -> None:
+        self.keyframe_points.sort(key=lambda point: point.co[0])
+
+    def keyframes(self) -> list[tuple[int, int]]:
+        return [(round(p.co[0]), round(p.co[1])) for p in self.keyframe_points]
+
+
+def random_track(
+    rng: random.Random, count: int, first: int = 0
+) -> list[tuple[int, int]]:
+    keyframes: list[tuple[int, int]] = []
+    frame = first
+    for _ in range(count):
+        frame += rng.randint(1, 6)
+        keyframes.append((frame, rng.randint(0, 14)))
+    return keyframes
+
+
+def edit_track(
+    rng: random.Random, track: list[tuple[int, int]]
+) -> list[tuple[int, int]]:
+    """`track` with a few random runs replaced, or an unrelated track."""
+    edited = dict(track)
+    for _ in range(rng.randint(0, 4)):
+        if not edited or rng.random() < 0.1:
+            edited = dict(random_track(rng, rng.randint(0, 50)))
+            continue
+        frames = sorted(edited)
+        start = rng.randrange(len(frames))
+        end = min(len(frames), start + rng.randint(0, 10))
+        for frame in frames[start:end]:
+            del edited[frame]
+        first = frames[start - 1] if start else 0
+        for frame, value in random_track(rng, rng.randint(0, 12), first):
+            if end == len(frames) or frame < frames[end]:
+                edited[frame] = value
+    return sorted(edited.items())
+
+
+def check_case(rng: random.Random) -> str | None:
+    """The first problem syncing a random edit, or None."""
+    track = random_track(rng, rng.choice([0, 1, 5, 200]))
+    fcurve = StubFCurve(track)
+    edited = edit_track(rng, track)
+
+    result = sync_fcurve(fcurve, edited)
+    if fcurve.keyframes() != edited:
+        return f"keys differ from the file after {result}"
+    points = fcurve.keyframe_points
+    untouched = [p for p in points if not p.touched]
+    if len(untouched) != result.kept:
+        return f"{len(untouched)} untouched points, but {result}"
+    if any(p.interpolation != BEZIER for p in untouched):
+        return "an untouched point lost its interpolation"
+    if any(p.interpolation != CONSTANT for p in points if p.touched):
+        return "a synced point isn't CONSTANT"
+    if result.kept + result.moved + result.added != len(edited):
+        return f"{result} doesn't add up to {len(edited)} keys"
+
+    writes = points.writes
+    again = sync_fcurve(fcurve, edited)
+    if again.kept != len(edited) or again.ranges or points.writes != writes:
+        return f"syncing again changed something: {again}"
+    return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Check the Blender keyframe importer against a stub fcurve."
+    )
+    parser.add_argument("--cases", default=300, type=int)
+    parser.add_argument("--seed", default=1, type=int)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    for case in range(args.cases):
+        problem = check_case(rng)
+        if problem is not None:
+            print(f"Case {case}: {problem}")
+            sys.exit(1)
+    print(f"All {args.cases} cases match.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,357 @@
+# pyright: reportAny=false, reportUnusedCallResult=false
+"""Differential check of keyframe engines against the reference ones.
+
+Every candidate engine runs on the same input as the reference engine:
+the bundled audio.json, randomized Whisper transcripts, randomized
+phoneme lists and randomized Rhubarb TSVs. Results are compared keyframe
+(or viseme) by keyframe and the first diverging one is reported with the
+run times side by side.
+
+Usage:
+    python equivalence.py
+    python equivalence.py --cases 50 --words 3000 --events 200000
+
+Candidates go into PLACEMENT_ENGINES, VISEME_ENGINES or RHUBARB_ENGINES.
+"""
+
+import argparse
+import json
+import logging
+import random
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import main
+import phoneme_to_viseme
+
+# (Whisper JSON file, viseme map, language) -> keyframes
+PlacementEngine = Callable[[str, dict[str, int], str], list[tuple[int, int]]]
+# Phonemes per word -> visemes per word
+VisemeEngine = Callable[[list[str | list[str]]], list[list[str]]]
+# (Rhubarb TSV file, viseme map, min gap, max duration) -> frame data text
+RhubarbEngine = Callable[[str, dict[str, int], float, float], str]
+
+
+def place_reference(
+    input_file: str, viseme_map: dict[str, int], language: str
+) -> list[tuple[int, int]]:
+    words, words_only_text = main.get_words_data(input_file)
+    phonemes = main.get_phonemes(words_only_text, language, main.phrase_starts(words))
+    return main.calc_keyframes(words, phonemes, viseme_map, False)
+
+
+def place_split(
+    input_file: str, viseme_map: dict[str, int], language: str
+) -> list[tuple[int, int]]:
+    words, words_only_text = main.get_words_data(input_file)
+    return main.calc_keyframes_split(
+        words, words_only_text, viseme_map, language, False, jobs
+    )
+
+
+def place_pipeline(
+    input_file: str, viseme_map: dict[str, int], language: str
+) -> list[tuple[int, int]]:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output_file = str(Path(tmp_dir) / "out.txt")
+        main.run_pipeline(
+            input_file, [("text", output_file)], viseme_map, language, jobs=jobs
+        )
+        with open(output_file, encoding="utf-8") as f:
+            return parse_frame_data(f.read())
+
+
+PLACEMENT_ENGINES: dict[str, PlacementEngine] = {
+    "reference": place_reference,
+    "split": place_split,
+    "pipeline": place_pipeline,
+}
+VISEME_ENGINES: dict[str, VisemeEngine] = {
+    "reference": lambda words: [main.get_visemes(phonemes) for phonemes in words],
+}
+RHUBARB_ENGINES: dict[str, RhubarbEngine] = {
+    "reference": lambda tsv, viseme_map, min_gap, max_duration: main.format_frame_data(
+        main.rhubarb_events_to_keyframes(
+            main.read_rhubarb_events(tsv), viseme_map, min_gap, max_duration, main.frame
+        )
+    ),
+    # Falls back to the reference on unsorted files, or without NumPy
+    "numpy": lambda tsv, viseme_map, min_gap, max_duration: main.process_rhubarb_output(
+        tsv, viseme_map, min_gap, max_duration, main.frame
+    ),
+}
+
+jobs = 2  # Worker processes for the split and pipeline engines
+
+
+def parse_frame_data(frame_data: str) -> list[tuple[int, int]]:
+    keyframes: list[tuple[int, int]] = []
+    for line in frame_data.splitlines():
+        parts = line.split()
+        if len(parts) >= 2:
+            keyframes.append((int(parts[0]), int(parts[1])))
+
+    return keyframes
+
+
+def first_difference(
+    reference: list[tuple[int, int]], candidate: list[tuple[int, int]], unit: str
+) -> str | None:
+    """Where `candidate` first diverges from `reference`, or None."""
+    for index, (expected, actual) in enumerate(zip(reference, candidate)):
+        if expected != actual:
+            return f"{unit} {index}: expected {expected}, got {actual}"
+    if len(reference) != len(candidate):
+        index = min(len(reference), len(candidate))
+        expected = reference[index] if index < len(reference) else "end"
+        actual = candidate[index] if index < len(candidate) else "end"
+        return f"{unit} {index}: expected {expected}, got {actual}"
+
+    return None
+
+
+def write_transcript(
+    filename: str, rng: random.Random, vocabulary: list[str], count: int
+) -> str:
+    """A Whisper JSON transcript with the timing cases placement must survive:
+    zero-duration words, words overlapping the previous one, and gaps of
+    minutes. Returns a short description."""
+    words = []
+    t = 0.0
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.05:
+            t += rng.uniform(60, 600)  # Huge gap
+        elif roll < 0.15:
+            t = max(0.0, t - rng.uniform(0, 0.3))  # Overlap
+        else:
+            t += rng.choice([0, rng.uniform(0, 0.05), rng.uniform(0.05, 1.5)])
+        duration = 0 if rng.random() < 0.08 else rng.uniform(0.01, 0.8)
+        words.append(
+            {
+                "word": rng.choice(vocabulary),
+                "start": round(t, 2),
+                "end": round(t + duration, 2),
+            }
+        )
+        t += duration
+
+    segments = [{"words": words[i : i + 20]} for i in range(0, len(words), 20)]
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump({"segments": segments}, f, ensure_ascii=False)
+
+    return f"{count} words"
+
+
+def random_phonemes(rng: random.Random, count: int) -> list[str | list[str]]:
+    """Phonemes for `count` words, as the placement code passes them to
+    get_visemes: lists of pinyin syllable phonemes and espeak strings. Some
+    words are empty, and some phonemes have no viseme."""
+    symbols = sorted(phoneme_to_viseme.phoneme_to_viseme_arkit_v2)
+    symbols += ["ˈ", "ː", "ʔ", "-", " ", "UNK"]
+    single = [symbol for symbol in symbols if len(symbol) == 1]
+    words: list[str | list[str]] = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.1:
+            words.append(rng.choice([[], ""]))
+        elif roll < 0.4:
+            words.append("".join(rng.choices(single, k=rng.randint(1, 12))))
+        else:
+            words.append(rng.choices(symbols, k=rng.randint(1, 8)))
+
+    return words
+
+
+def write_tsv(filename: str, rng: random.Random, count: int) -> str:
+    """A Rhubarb TSV with jitter below the min gap, repeated timestamps, long
+    holds and huge gaps. Some files are not sorted by time."""
+    shapes = "ABCDEFGHX"
+    lines = []
+    t = rng.choice([0.0, rng.uniform(0, 2)])
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.02:
+            t += rng.uniform(60, 600)
+        elif roll < 0.1:
+            pass  # Same timestamp again
+        elif roll < 0.4:
+            t += rng.uniform(0, 0.05)
+        else:
+            t += rng.uniform(0.05, 1.5)
+        lines.append(f"{t:.2f}\t{rng.choice(shapes)}")
+
+    unsorted = rng.random() < 0.2
+    if unsorted:
+        for _ in range(max(1, count // 50)):
+            i, j = rng.randrange(count), rng.randrange(count)
+            lines[i], lines[j] = lines[j], lines[i]
+
+    with open(filename, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+    return f"{count} events{', unsorted' if unsorted else ''}"
+
+
+def compare(
+    case: str,
+    engines: dict[str, Callable[[], list[tuple[int, int]]]],
+    unit: str = "keyframe",
+) -> bool:
+    """Run every engine on one case and print one line per candidate."""
+    start = time.perf_counter()
+    reference = engines["reference"]()
+    reference_time = time.perf_counter() - start
+
+    if len(engines) == 1:
+        print(
+            f"{case:<36} {'-':<10} {len(reference):>7} "
+            f"{reference_time * 1000:>9.1f} {'-':>9} {'-':>7}  no candidates"
+        )
+
+    ok = True
+    for name, engine in engines.items():
+        if name == "reference":
+            continue
+        start = time.perf_counter()
+        candidate = engine()
+        elapsed = time.perf_counter() - start
+
+        difference = first_difference(reference, candidate, unit)
+        if difference is None:
+            result = "same"
+        else:
+            result = f"DIFFERS at {difference}"
+            ok = False
+        print(
+            f"{case:<36} {name:<10} {len(reference):>7} "
+            f"{reference_time * 1000:>9.1f} {elapsed * 1000:>9.1f} "
+            f"{reference_time / elapsed if elapsed else 0:>6.2f}x  {result}"
+        )
+
+    return ok
+
+
+def run(args: argparse.Namespace) -> bool:
+    global jobs
+    jobs = args.jobs
+    rng = random.Random(args.seed)
+    viseme_map = main.read_viseme_map(args.viseme_map)
+    rhubarb_map = main.read_viseme_map(args.rhubarb_map)
+    _, vocabulary = main.get_words_data(args.input_file)
+
+    print(
+        f"{'case':<36} {'engine':<10} {'keys':>7} "
+        f"{'ref ms':>9} {'cand ms':>9} {'speed':>7}  result"
+    )
+    ok = True
+
+    def placement(case: str, input_file: str) -> bool:
+        return compare(
+            case,
+            {
+                name: (
+                    lambda engine=engine: engine(input_file, viseme_map, args.language)
+                )
+                for name, engine in PLACEMENT_ENGINES.items()
+            },
+        )
+
+    def visemes(case: str, words: list[str | list[str]]) -> bool:
+        # (word index, viseme id) per viseme, so word boundaries count too
+        return compare(
+            case,
+            {
+                name: (
+                    lambda engine=engine: [
+                        (index, viseme_map[viseme])
+                        for index, word_visemes in enumerate(engine(words))
+                        for viseme in word_visemes
+                    ]
+                )
+                for name, engine in VISEME_ENGINES.items()
+            },
+            unit="viseme",
+        )
+
+    def rhubarb(case: str, tsv: str, min_gap: float, max_duration: float) -> bool:
+        return compare(
+            f"{case} gap={min_gap} max={max_duration}",
+            {
+                name: (
+                    lambda engine=engine: parse_frame_data(
+                        engine(tsv, rhubarb_map, min_gap, max_duration)
+                    )
+                )
+                for name, engine in RHUBARB_ENGINES.items()
+            },
+        )
+
+    ok &= placement(args.input_file, args.input_file)
+
+    words, words_only_text = main.get_words_data(args.input_file)
+    phonemes = main.get_phonemes(
+        words_only_text, args.language, main.phrase_starts(words)
+    )
+    if args.language == "zh":
+        # Syllables are looked up one at a time
+        phonemes = [syllable for word in phonemes for syllable in word]
+    ok &= visemes(f"{args.input_file} phonemes", phonemes)
+    for index in range(args.cases):
+        count = rng.choice([1, 2, 10, args.words])
+        ok &= visemes(f"phonemes {index} ({count} words)", random_phonemes(rng, count))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for index in range(args.cases):
+            input_file = str(Path(tmp_dir) / f"transcript{index}.json")
+            count = rng.choice([1, 2, 10, args.words])
+            description = write_transcript(input_file, rng, vocabulary, count)
+            ok &= placement(f"transcript {index} ({description})", input_file)
+
+        for index in range(args.cases):
+            tsv = str(Path(tmp_dir) / f"rhubarb{index}.tsv")
+            count = rng.choice([1, 2, 10, args.events])
+            description = write_tsv(tsv, rng, count)
+            for min_gap, max_duration in ((0.05, 0), (0.075, 0.3), (0.2, 1.0)):
+                case = f"tsv {index} ({description})"
+                ok &= rhubarb(case, tsv, min_gap, max_duration)
+
+    print("All candidates match." if ok else "Some candidates differ.")
+    return ok
+
+
+def setup_argparse() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Compare keyframe engines against the reference implementation."
+    )
+    parser.add_argument(
+        "input_file",
+        nargs="?",
+        default="audio.json",
+        help="Whisper JSON to check, and the vocabulary for random transcripts.",
+    )
+    parser.add_argument("--language", "-l", default="zh")
+    parser.add_argument("--viseme_map", "-m", default="viseme_map.json")
+    parser.add_argument("--rhubarb-map", default="rhubarb_map.json")
+    parser.add_argument("--cases", type=int, default=10, help="Random cases per kind.")
+    parser.add_argument(
+        "--words", type=int, default=2000, help="Words in the larger transcripts."
+    )
+    parser.add_argument(
+        "--events", type=int, default=50000, help="Events in the larger TSVs."
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--jobs", "-j", type=int, default=jobs, help="Processes for split/pipeline."
+    )
+
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    # Engines log every step; only problems are interesting here
+    logging.basicConfig(level=logging.ERROR, format="%(levelname)s: %(message)s")
+    sys.exit(0 if run(setup_argparse()) else 1)
@@ -0,0 +1,246 @@
+"""
+Keyframe exporters for the formats we feed to other tools.
+
+Each exporter receives finished keyframes one at a time through `write` and
+adds whatever the format needs at the end in `finish`. `ExportSet` fans a
+single keyframe stream out to several exporters, so one run writes all
+formats without building any of them twice.
+
+New formats register themselves with `@register("name")`.
+"""
+
+import json
+import os
+import secrets
+from abc import ABC, abstractmethod
+from collections.abc import Iterable
+from contextlib import ExitStack
+from typing import TextIO
+
+EXPORTERS: dict[str, type["Exporter"]] = {}
+
+
+def register(name: str):
+    def decorator(cls: type["Exporter"]) -> type["Exporter"]:
+        EXPORTERS[name] = cls
+        return cls
+
+    return decorator
+
+
+class Exporter(ABC):
+    suffix = ".txt"
+
+    def __init__(self, f: TextIO, frame_rate: int):
+        self.f = f
+        self.frame_rate = frame_rate
+
+    @abstractmethod
+    def write(self, frame: int, viseme_id: int) -> None: ...
+
+    def finish(self) -> None:
+        pass
+
+
+@register("text")
+class TextExporter(Exporter):
+    """The `<frame> <viseme id>` lines the Blender panel reads."""
+
+    def __init__(self, f: TextIO, frame_rate: int):
+        super().__init__(f, frame_rate)
+        self.separator = ""
+
+    def write(self, frame: int, viseme_id: int) -> None:
+        self.f.write(f"{self.separator}{frame} {viseme_id}")
+        self.separator = "\n"
+
+
+@register("csv")
+class CsvExporter(Exporter):
+    suffix = ".csv"
+
+    def __init__(self, f: TextIO, frame_rate: int):
+        super().__init__(f, frame_rate)
+        self.f.write("frame,time,viseme\n")
+
+    def write(self, frame: int, viseme_id: int) -> None:
+        self.f.write(f"{frame},{frame / self.frame_rate:.4f},{viseme_id}\n")
+
+
+@register("json")
+class JsonExporter(Exporter):
+    suffix = ".json"
+
+    def __init__(self, f: TextIO, frame_rate: int):
+        super().__init__(f, frame_rate)
+        self.f.write(f'{{"frame_rate": {frame_rate}, "keyframes": [')
+        self.separator = "\n"
+
+    def write(self, frame: int, viseme_id: int) -> None:
+        time = round(frame / self.frame_rate, 4)
+        self.f.write(
+            f'{self.separator}  {{"frame": {frame}, "time": {time}, "viseme": {viseme_id}}}'
+        )
+        self.separator = ",\n"
+
+    def finish(self) -> None:
+        self.f.write("\n]}\n")
+
+
+@register("godot")
+class GodotExporter(Exporter):
+    """An Animation resource with one discrete value track.
+
+    The track drives `TRACK_PATH`, e.g. the frame of a Sprite2D holding the
+    mouth textures. Godot wants times and values as separate arrays, so
+    they are collected and written at the end.
+    """
+
+    suffix = ".tres"
+    TRACK_PATH = ".:frame"
+
+    def __init__(self, f: TextIO, frame_rate: int):
+        super().__init__(f, frame_rate)
+        self.times: list[str] = []
+        self.values: list[str] = []
+
+    def write(self, frame: int, viseme_id: int) -> None:
+        self.times.append(str(round(frame / self.frame_rate, 4)))
+        self.values.append(str(viseme_id))
+
+    def finish(self) -> None:
+        step = 1 / self.frame_rate
+        length = float(self.times[-1]) + step if self.times else 0
+        self.f.write(
+            '[gd_resource type="Animation" format=3]\n'
+            "\n"
+            "[resource]\n"
+            'resource_name = "lip_sync"\n'
+            f"length = {round(length, 4)}\n"
+            f"step = {round(step, 6)}\n"
+            'tracks/0/type = "value"\n'
+            "tracks/0/imported = false\n"
+            "tracks/0/enabled = true\n"
+            f'tracks/0/path = NodePath("{self.TRACK_PATH}")\n'
+            "tracks/0/interp = 0\n"
+            "tracks/0/loop_wrap = true\n"
+            "tracks/0/keys = {\n"
+            f'"times": PackedFloat32Array({", ".join(self.times)}),\n'
+            f'"transitions": PackedFloat32Array({", ".join(["1"] * len(self.times))}),\n'
+            '"update": 1,\n'
+            f'"values": [{", ".join(self.values)}]\n'
+            "}\n"
+        )
+
+
+@register("spine")
+class SpineExporter(Exporter):
+    """A Spine animation with an attachment timeline on the `SLOT` slot.
+
+    Attachments are named after the viseme id.
+    """
+
+    suffix = ".spine.json"
+    SLOT = "mouth"
+
+    def __init__(self, f: TextIO, frame_rate: int):
+        super().__init__(f, frame_rate)
+        self.f.write(
+            f'{{"animations": {{"lip_sync": {{"slots": {{{json.dumps(self.SLOT)}: '
+            '{"attachment": ['
+        )
+        self.separator = "\n"
+
+    def write(self, frame: int, viseme_id: int) -> None:
+        time = round(frame / self.frame_rate, 4)
+        self.f.write(f'{self.separator}  {{"time": {time}, "name": "{viseme_id}"}}')
+        self.separator = ",\n"
+
+    def finish(self) -> None:
+        self.f.write("\n]}}}}}\n")
+
+
+def create_temp_file(filename: str) -> tuple[int, str]:
+    """Create a new file with a random name next to `filename`.
+
+    Returns the open descriptor and the name. The file is created with mode
+    0666 like any other output, so the umask applies to it.
+    """
+    directory = os.path.dirname(filename) or "."
+    flags = os.O_CREAT | os.O_EXCL | os.O_WRONLY | getattr(os, "O_BINARY", 0)
+    while True:
+        temp_file = os.path.join(
+            directory, f".{os.path.basename(filename)}.{secrets.token_hex(4)}.tmp"
+        )
+        try:
+            return os.open(temp_file, flags, 0o666), temp_file
+        except FileExistsError:
+            continue
+
+
+class ExportSet:
+    """Several exporters fed from one keyframe stream.
+
+    `targets` are (format, filename) pairs. Use as a context manager. Each
+    file is written to a temporary file next to it, which replaces it only
+    once everything is finished; on an exception the targets are left as
+    they were.
+    """
+
+    def __init__(self, targets: list[tuple[str, str]], frame_rate: int):
+        for name, _ in targets:
+            if name not in EXPORTERS:
+                raise ValueError(
+                    f"Unknown export format: {name}. Available: {', '.join(EXPORTERS)}"
+                )
+        self.targets = targets
+        self.frame_rate = frame_rate
+        self.exporters: list[Exporter] = []
+        self._temp_files: list[str] = []
+        self._stack = ExitStack()
+
+    def __enter__(self) -> "ExportSet":
+        try:
+            for name, filename in self.targets:
+                fd, temp_file = create_temp_file(filename)
+                self._temp_files.append(temp_file)
+                f = self._stack.enter_context(open(fd, "w", encoding="utf-8"))
+                self.exporters.append(EXPORTERS[name](f, self.frame_rate))
+        except BaseException:
+            self._discard()
+            raise
+        return self
+
+    def _discard(self) -> None:
+        self._stack.close()
+        for temp_file in self._temp_files:
+            os.unlink(temp_file)
+
+    def write(self, frame: int, viseme_id: int) -> None:
+        for exporter in self.exporters:
+            exporter.write(frame, viseme_id)
+
+    def __exit__(self, exc_type: object, *_: object) -> None:
+        if exc_type is not None:
+            self._discard()
+            return
+
+        try:
+            for exporter in self.exporters:
+                exporter.finish()
+            self._stack.close()
+        except BaseException:
+            self._discard()
+            raise
+        for temp_file, (_name, filename) in zip(self._temp_files, self.targets):
+            os.replace(temp_file, filename)
+
+
+def export(
+    keyframes: Iterable[tuple[int, int]],
+    targets: list[tuple[str, str]],
+    frame_rate: int,
+) -> None:
+    with ExportSet(targets, frame_rate) as exports:
+        for frame, viseme_id in keyframes:
+            exports.write(frame, viseme_id)
@@ -0,0 +1,150 @@
+"""
+Prebuilt word -> phoneme lexicon for the espeak path.
+
+Built once from a word list (`main.py --build-lexicon`), then read through
+mmap with a binary search per word, so opening one loads nothing:
+
+    header   <4sHH8s32sI   magic, version, reserved, language, table hash, count
+    offsets  <I * (count + 1)   record offsets from the end of the offsets
+    records  word, tab, phonemes   UTF-8, sorted by word
+
+Only the phoneme characters `phoneme_to_viseme_arkit_v2` maps are stored,
+which is all `get_visemes` reads. The table hash covers that table and the
+language; a lexicon built against another table is ignored.
+"""
+
+import hashlib
+import json
+import logging
+import mmap
+import string
+import struct
+from collections.abc import Iterable
+
+import phoneme_to_viseme
+
+MAGIC = b"LSLX"
+VERSION = 1
+HEADER = struct.Struct("<4sHH8s32sI")
+OFFSET = struct.Struct("<I")
+PUNCTUATION = string.punctuation + "¡¿—…«»“”"
+
+# The lexicon this process consults, set by `attach`
+active: "Lexicon | None" = None
+
+
+def normalize(word: str) -> str:
+    """The lexicon key for a Whisper word, e.g. " Hello," -> "hello"."""
+    return word.strip().strip(PUNCTUATION).lower()
+
+
+def keep_mapped(phonemes: str) -> str:
+    table = phoneme_to_viseme.phoneme_to_viseme_arkit_v2
+    return "".join(c for c in phonemes if c in table)
+
+
+def table_hash(language: str) -> bytes:
+    table = json.dumps(
+        phoneme_to_viseme.phoneme_to_viseme_arkit_v2, sort_keys=True, ensure_ascii=False
+    )
+    return hashlib.sha256(f"{VERSION}\0{language}\0{table}".encode()).digest()
+
+
+def distinct_words(words: Iterable[str]) -> list[str]:
+    """Sorted, normalized lexicon keys for `words`."""
+    return sorted({key for key in map(normalize, words) if key}, key=str.encode)
+
+
+def write(filename: str, words: list[str], phonemes: list[str], language: str) -> None:
+    """Write `words` (from `distinct_words`) with their espeak phonemes."""
+    records = [f"{word}\t{keep_mapped(p)}".encode() for word, p in zip(words, phonemes)]
+    offsets = [0]
+    for record in records:
+        offsets.append(offsets[-1] + len(record))
+
+    with open(filename, "wb") as f:
+        f.write(
+            HEADER.pack(
+                MAGIC, VERSION, 0, language.encode(), table_hash(language), len(records)
+            )
+        )
+        f.write(b"".join(OFFSET.pack(offset) for offset in offsets))
+        f.write(b"".join(records))
+
+
+class Lexicon:
+    def __init__(self, filename: str, mm: mmap.mmap, language: str, count: int):
+        self.filename = filename
+        self.mm = mm
+        self.language = language
+        self.count = count
+        self.records = HEADER.size + OFFSET.size * (count + 1)
+
+    @classmethod
+    def open(cls, filename: str) -> "Lexicon":
+        with open(filename, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, _, language, digest, count = HEADER.unpack_from(mm, 0)
+        language = language.rstrip(b"\0").decode()
+        if magic != MAGIC or version != VERSION:
+            mm.close()
+            raise ValueError(f"{filename} is not a version {VERSION} lexicon file.")
+        if digest != table_hash(language):
+            mm.close()
+            raise ValueError(
+                f"{filename} was built for another phoneme to viseme table. "
+                "Rebuild it with --build-lexicon."
+            )
+
+        return cls(filename, mm, language, count)
+
+    def _record(self, index: int) -> tuple[int, int]:
+        position = HEADER.size + OFFSET.size * index
+        start, end = struct.unpack_from("<II", self.mm, position)
+        return self.records + start, self.records + end
+
+    def get(self, word: str) -> str | None:
+        key = normalize(word).encode()
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start, end = self._record(mid)
+            tab = self.mm.find(b"\t", start, end)
+            probe = self.mm[start:tab]
+            if probe < key:
+                lo = mid + 1
+            elif probe > key:
+                hi = mid
+            else:
+                return self.mm[tab + 1 : end].decode()
+
+        return None
+
+    def lookup(self, words: list[str]) -> list[str | None]:
+        """Phonemes per word, None for words the lexicon doesn't have."""
+        return [self.get(word) for word in words]
+
+    def close(self) -> None:
+        self.mm.close()
+
+    def __enter__(self) -> "Lexicon":
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
+
+
+def attach(filename: str | None) -> None:
+    """Make `get_phonemes` in this process consult the lexicon in `filename`."""
+    global active
+    if active is not None:
+        active.close()
+        active = None
+    if filename is None:
+        return
+
+    try:
+        active = Lexicon.open(filename)
+    except ValueError as e:
+        logging.warning(f"{e} Phonemizing every word with espeak.")
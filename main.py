@@ -1,21 +1,55 @@
 # pyright: reportAny=false, reportUnusedCallResult=false
 import argparse
+import hashlib
+import heapq
 import json
 import logging
+import math
+import os
+import queue
 import shutil
 import subprocess
+import tempfile
+import threading
+import time
+import wave
+from array import array
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 from pprint import pprint
-from typing import Any, cast
+from typing import Any, Protocol, cast
 
 import pypinyin
 from phonemizer import phonemize
+from phonemizer.separator import Separator
+from pypinyin.converter import UltimateConverter
+from pypinyin.core import Pinyin
 
+import exporters
+import lexicon
+import phoneme_cache
 import phoneme_to_viseme
 import pinyin_to_phoneme
+from timeline import Timeline
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 SOME_ISO_639_3: list[str] = ["en", "cmn"]
+ESPEAK_LANGUAGES = {"en": "en-us", "zh": "cmn"}
 frame = 30
 min_gap_seconds = 0.075
 max_duration_seconds = 0
@@ -23,6 +57,12 @@ silence_seconds = 0.08
 min_hold_frames = (
     3  # Minimum frames a viseme must hold before changing (prevents flickering)
 )
+rhubarb_sample_rate = 16000  # Rhubarb converts everything to 16 kHz mono internally
+span_padding_seconds = 0.3
+max_keys = 0  # Keyframe budget in total, 0 for none
+max_keys_per_second = 0.0  # Keyframe budget per second of animation, 0 for none
+phonemize_jobs = 1  # phonemizer processes for the espeak path
+logged_no_resampling = False  # Logged that NumPy is missing for preprocess_audio
 
 
 ## ======= Utils =======
@@ -49,17 +89,54 @@ class Word:
     end_time: float
 
 
-def get_words_data(filename: str) -> tuple[list[Word], list[str]]:
-    with open(filename) as f:
-        audio_data = json.load(f)
+if msgspec is not None:
+    # Only the fields we use. msgspec skips everything else (tokens,
+    # avg_logprob, probabilities, ...) without building objects for it.
+
+    class _WhisperWord(msgspec.Struct):
+        word: str
+        start: float
+        end: float
 
-    words: list[Word] = []
-    words_only_text: list[str] = []
+    class _WhisperSegment(msgspec.Struct):
+        words: list[_WhisperWord]
 
-    for segment in audio_data["segments"]:
-        for word in segment["words"]:
-            words_only_text.append(word["word"])
-            words.append(Word(word["word"], word["start"], word["end"]))
+    class _WhisperData(msgspec.Struct):
+        segments: list[_WhisperSegment]
+
+    _whisper_decoder = msgspec.json.Decoder(_WhisperData)
+
+
+def decode_words_json(raw: bytes) -> list[Word]:
+    """Decode the whole Whisper JSON document, then pick out the words."""
+    audio_data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+    return [
+        Word(word["word"], word["start"], word["end"])
+        for segment in audio_data["segments"]
+        for word in segment["words"]
+    ]
+
+
+def decode_words(raw: bytes) -> list[Word]:
+    """Decode Whisper JSON into word timings, using msgspec if installed."""
+    if msgspec is None:
+        return decode_words_json(raw)
+
+    audio_data = _whisper_decoder.decode(raw)
+
+    return [
+        Word(word.word, word.start, word.end)
+        for segment in audio_data.segments
+        for word in segment.words
+    ]
+
+
+def get_words_data(filename: str) -> tuple[list[Word], list[str]]:
+    with open(filename, "rb") as f:
+        words = decode_words(f.read())
+
+    words_only_text: list[str] = [word.text for word in words]
 
     return (words, words_only_text)
 
@@ -100,48 +177,242 @@ def read_viseme_map(filename: str) -> dict[str, int]:
     return data
 
 
-def get_phonemes(words_only_text: list[str], language: str) -> list[Any]:
+PHRASE_GAP_SECONDS = 0.3  # A pause this long ends a phrase
+
+
+def phrase_starts(words: list[Word]) -> list[int]:
+    """Start indices of the phrases in `words`: runs of words with no pause
+    of PHRASE_GAP_SECONDS or more between them.
+
+    Chinese is converted to pinyin a phrase at a time, so cutting a
+    transcript only at phrase starts doesn't change its phonemes.
+    """
+    starts = [0] if words else []
+    for index in range(1, len(words)):
+        if words[index].start_time - words[index - 1].end_time >= PHRASE_GAP_SECONDS:
+            starts.append(index)
+
+    return starts
+
+
+def get_phonemes(
+    words_only_text: list[str], language: str, starts: list[int]
+) -> list[Any]:
     """Return phoneme data per word.
 
     For Chinese: returns list[list[list[str]]] — per-word, per-syllable groups.
       e.g. "辛苦" -> [["ɕ","i","n"], ["k","u"]]
     For English: returns list[str] — per-word flat phoneme strings.
+
+    `starts` are the phrase start indices from `phrase_starts`. Only Chinese
+    uses them; other languages are phonemized word by word.
     """
     if language == "zh":
-        phonemes_list: list[list[list[str]]] = []
-        for text in words_only_text:
-            pinyins = pypinyin.lazy_pinyin(
-                text, style=pypinyin.Style.TONE3, neutral_tone_with_five=True
-            )
-            # Each pinyin syllable becomes its own group
-            syllable_groups: list[list[str]] = []
-            for p in pinyins:
-                p_clean = "".join([c for c in p if c.isalpha()]).lower()
-                if p_clean in pinyin_to_phoneme.pinyin_to_ipa_map:
-                    syl_phonemes = pinyin_to_phoneme.convert_pinyin_to_phonemes(p)
-                    if syl_phonemes:
-                        syllable_groups.append(syl_phonemes)
+        return chinese_phonemes(words_only_text, starts)
+
+    return word_phonemes(words_only_text, language)
+
+
+def word_phonemes(words_only_text: list[str], language: str) -> list[str]:
+    """espeak phonemes per word.
+
+    In worker processes with a shared phoneme cache attached, words another
+    worker already phonemized are taken from the cache.
+    """
+    if phoneme_cache.active is not None:
+        return phoneme_cache.active.get_phonemes(words_only_text, language, _phonemize)
+
+    return _phonemize(words_only_text, language)
+
+
+NO_PINYIN = "\0"  # Marks characters pypinyin has no pinyin for
+PHRASE_BREAK = "\n"  # Joins phrases; pypinyin never segments across it
+
+
+class MemoizedConverter(UltimateConverter):
+    """pypinyin's converter, remembering the style conversion of every
+    (character, reading) it has seen. Converting each syllable's style is
+    most of what lazy_pinyin spends its time on, and a transcript repeats
+    the same few thousand syllables."""
+
+    def __init__(self, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.styles: dict[tuple[Any, ...], str] = {}
+
+    def convert_style(
+        self, han: str, orig_pinyin: str, style: Any, strict: bool, **kwargs: Any
+    ) -> str:
+        key = (han, orig_pinyin, style, strict)
+        converted = self.styles.get(key)
+        if converted is None:
+            converted = super().convert_style(han, orig_pinyin, style, strict, **kwargs)
+            self.styles[key] = converted
+        return converted
+
+
+cached_pinyin = Pinyin(MemoizedConverter(neutral_tone_with_five=True))
+
+
+def mark_no_pinyin(chars: str) -> Any:
+    """lazy_pinyin errors callback: each character as its own marked item."""
+    return [NO_PINYIN + c for c in chars]
+
+
+def get_pinyins_per_word(
+    words_only_text: list[str], starts: list[int]
+) -> list[list[str]]:
+    """Pinyin syllables per word, like calling lazy_pinyin on each phrase.
+
+    The whole transcript is converted in one call, so pypinyin sees phrases
+    across word boundaries when picking readings for polyphonic characters.
+    Phrases are joined with PHRASE_BREAK, so a word's readings only depend
+    on its own phrase and a transcript cut at phrase starts converts the
+    same. Every character comes back as one item (non-Chinese characters marked
+    with NO_PINYIN), which maps the items back onto the words by offset.
+    Runs of non-Chinese characters within a word are joined into one item,
+    as lazy_pinyin does.
+    """
+    ends = starts[1:] + [len(words_only_text)]
+    text = PHRASE_BREAK.join(
+        "".join(words_only_text[start:end]) for start, end in zip(starts, ends)
+    )
+    items = cached_pinyin.lazy_pinyin(
+        text, style=pypinyin.Style.TONE3, errors=mark_no_pinyin
+    )
+    if len(items) != len(text):
+        logging.warning("Pinyin offsets don't line up. Converting word by word.")
+        return get_pinyins_separately(words_only_text)
+
+    pinyins_per_word: list[list[str]] = []
+    offset = 0
+    phrase_ends = set(ends)
+    for index, word in enumerate(words_only_text):
+        pinyins: list[str] = []
+        in_run = False
+        for item in items[offset : offset + len(word)]:
+            if item.startswith(NO_PINYIN):
+                if in_run:
+                    pinyins[-1] += item[1:]
                 else:
-                    # English fallback
-                    if any(c.isalpha() for c in p):
-                        eng_phonemes = phonemize(
-                            p, language="en-us", backend="espeak", strip=True
-                        )
-                        if isinstance(eng_phonemes, str):
-                            cleaned = remove_lang_codes(eng_phonemes).strip()
-                            if cleaned:
-                                syllable_groups.append(list(cleaned))
-            phonemes_list.append(syllable_groups)
+                    pinyins.append(item[1:])
+                in_run = True
+            else:
+                pinyins.append(item)
+                in_run = False
+        pinyins_per_word.append(pinyins)
+        offset += len(word)
+        if index + 1 in phrase_ends:
+            offset += len(PHRASE_BREAK)
+
+    return pinyins_per_word
+
+
+def get_pinyins_separately(words_only_text: list[str]) -> list[list[str]]:
+    return [
+        pypinyin.lazy_pinyin(
+            text, style=pypinyin.Style.TONE3, neutral_tone_with_five=True
+        )
+        for text in words_only_text
+    ]
 
-        logging.info("Get phonemes (Chinese engine).")
-        return phonemes_list
 
-    phonemes = cast(list[str], phonemize(words_only_text, language="cmn", strip=True))
-    phonemes_removed_lang_codes: list[str] = list(map(remove_lang_codes, phonemes))
+def chinese_phonemes(
+    words_only_text: list[str], starts: list[int]
+) -> list[list[list[str]]]:
+    """Syllable groups per word. Pinyin syllables are converted here, in
+    process; anything else with letters in it is read as an English word,
+    and those go to espeak together through `word_phonemes`."""
+    pinyins_per_word = get_pinyins_per_word(words_only_text, starts)
+
+    english_words: dict[str, str] = {}
+    for pinyins in pinyins_per_word:
+        for p in pinyins:
+            p_clean = "".join([c for c in p if c.isalpha()]).lower()
+            if p_clean not in pinyin_to_phoneme.pinyin_to_ipa_map and any(
+                c.isalpha() for c in p
+            ):
+                english_words[p] = ""
+    if english_words:
+        english_words = dict(
+            zip(english_words, word_phonemes(list(english_words), "en"))
+        )
 
-    logging.info("Get phonemes.")
+    phonemes_list: list[list[list[str]]] = []
+    for pinyins in pinyins_per_word:
+        # Each pinyin syllable becomes its own group
+        syllable_groups: list[list[str]] = []
+        for p in pinyins:
+            if p in english_words:
+                cleaned = english_words[p].strip()
+                if cleaned:
+                    syllable_groups.append(list(cleaned))
+                continue
+            syl_phonemes = pinyin_to_phoneme.convert_pinyin_to_phonemes(p)
+            if syl_phonemes:
+                syllable_groups.append(syl_phonemes)
+        phonemes_list.append(syllable_groups)
+
+    logging.info("Get phonemes (Chinese engine).")
+    return phonemes_list
+
+
+def _phonemize(words_only_text: list[str], language: str) -> list[str]:
+    if lexicon.active is None or lexicon.active.language != language:
+        logging.info("Get phonemes.")
+        return espeak(words_only_text, language)
+
+    # Only words the lexicon doesn't know go to espeak, normalized the way
+    # lexicon keys are, so a word reads the same whether it's found or not
+    known = lexicon.active.lookup(words_only_text)
+    missing = [
+        lexicon.normalize(text)
+        for text, phonemes in zip(words_only_text, known)
+        if phonemes is None
+    ]
+    espeak_phonemes = iter(espeak(missing, language) if missing else [])
 
-    return phonemes_removed_lang_codes
+    logging.info(f"Get phonemes ({len(missing)} of {len(known)} not in lexicon).")
+
+    return [
+        phonemes if phonemes is not None else next(espeak_phonemes)
+        for phonemes in known
+    ]
+
+
+def espeak(words_only_text: list[str], language: str) -> list[str]:
+    # One line per word in, one line per word out: empty results are kept so
+    # the list stays aligned with the words when espeak has nothing to say.
+    phonemes = cast(
+        list[str],
+        phonemize(
+            words_only_text,
+            language=ESPEAK_LANGUAGES.get(language, language),
+            backend="espeak",
+            separator=Separator(phone="", syllable="", word=" "),
+            strip=True,
+            preserve_empty_lines=True,
+            njobs=phonemize_jobs,
+        ),
+    )
+
+    return list(map(remove_lang_codes, phonemes))
+
+
+def build_lexicon(input_file: str, output_file: str, language: str) -> None:
+    """Phonemize the words in a Whisper JSON or plain text file into a lexicon."""
+    if language == "zh":
+        logging.error("Chinese is converted with pypinyin, a lexicon is not used.")
+        return
+
+    if Path(input_file).suffix == ".json":
+        _, text = get_words_data(input_file)
+    else:
+        with open(input_file, encoding="utf-8") as f:
+            text = f.read().split()
+
+    words = lexicon.distinct_words(text)
+    lexicon.write(output_file, words, espeak(words, language), language)
+    logging.info(f"Wrote {len(words)} words to {output_file}.")
 
 
 def get_visemes(phonemes: str | list[str]) -> list[str]:
@@ -154,34 +425,115 @@ def get_visemes(phonemes: str | list[str]) -> list[str]:
     return visemes
 
 
-def calc_frame_data(
-    words: list[Word], phonemes: list[Any], viseme_map: dict[str, int], stats: bool
-) -> str:
-    logging.info("Calculating frame data...")
+class KeyframeScheduler:
+    """Resolve keyframe collisions and min-hold conflicts by viseme priority.
+
+    Candidate keyframes go on a heap ordered by frame, then priority (see
+    `phoneme_to_viseme.get_viseme_priority`), then most recently added. The
+    first candidate popped for a frame wins it. A keyframe closer than
+    `hold_frames` to the previous one is dropped, unless it is unskippable
+    (silence, PP, FF, TH): then it replaces a skippable previous keyframe,
+    or is kept next to an unskippable one.
+    """
+
+    def __init__(self, viseme_map: dict[str, int], hold_frames: int):
+        self.viseme_map = viseme_map
+        self.hold_frames = hold_frames
+        self.keyframes: list[tuple[int, str]] = []
+        self._heap: list[tuple[int, int, int, str]] = []
+        self._count = 0
+        self._last_popped = -1
+
+    def add(self, frame_num: int, viseme: str) -> None:
+        self.viseme_map[viseme]  # Unknown visemes fail here, not at flush
+        priority = phoneme_to_viseme.get_viseme_priority(viseme)
+        heapq.heappush(self._heap, (frame_num, priority, -self._count, viseme))
+        self._count += 1
+
+    def flush(self, before: float = math.inf) -> list[tuple[int, str]]:
+        """Resolve every candidate placed before frame `before`."""
+        heap = self._heap
+        while heap and heap[0][0] < before:
+            frame_num, _, _, viseme = heapq.heappop(heap)
+            if frame_num == self._last_popped:
+                continue
+            self._last_popped = frame_num
+            self._place(frame_num, viseme)
+
+        return self.keyframes
+
+    def _place(self, frame_num: int, viseme: str) -> None:
+        keyframes = self.keyframes
+        viseme_id = self.viseme_map[viseme]
 
-    output: dict[int, int] = {}
-    vieseme_stats_data: dict[str, int] = {}
+        if keyframes:
+            last_frame, last_viseme = keyframes[-1]
+            if self.viseme_map[last_viseme] == viseme_id:
+                return
+            if frame_num - last_frame < self.hold_frames:
+                if not phoneme_to_viseme.is_unskippable(viseme):
+                    return
+                if not phoneme_to_viseme.is_unskippable(last_viseme):
+                    keyframes.pop()
+                    if keyframes and self.viseme_map[keyframes[-1][1]] == viseme_id:
+                        return
 
-    VOWEL_VISEMES = {"aa", "E", "ih", "oh", "ou"}
+        keyframes.append((frame_num, viseme))
 
-    def get_viseme_weight(viseme: str) -> float:
-        if viseme in VOWEL_VISEMES:
-            return 2.0
-        return 1.0
 
-    def add_to_output(frame_num: int, viseme: str):
-        output[frame_num] = viseme_map[viseme]
-        if stats:
-            vieseme_stats_data[viseme] = vieseme_stats_data.get(viseme, 0) + 1
+VOWEL_VISEMES = {"aa", "E", "ih", "oh", "ou"}
 
-    def pick_primary_vowel(viseme_list: list[str]) -> str:
-        """If we can only show one viseme for a syllable, pick the main vowel."""
-        for v in viseme_list:
-            if v in VOWEL_VISEMES:
-                return v
-        return viseme_list[0] if viseme_list else "sli"
+
+def get_viseme_weight(viseme: str) -> float:
+    if viseme in VOWEL_VISEMES:
+        return 2.0
+    return 1.0
+
+
+def pick_primary_vowel(viseme_list: list[str]) -> str:
+    """If we can only show one viseme for a syllable, pick the main vowel."""
+    for v in viseme_list:
+        if v in VOWEL_VISEMES:
+            return v
+    return viseme_list[0] if viseme_list else "sli"
+
+
+class CandidateSink(Protocol):
+    """Where VisemePlacer sends candidate keyframes."""
+
+    def add(self, frame_num: int, viseme: str) -> None: ...
+
+
+class VisemePlacer:
+    """Places viseme keyframes word by word.
+
+    calc_frame_data runs it over a whole transcript; the pipelined mode
+    feeds it words as they come out of the phonemizer and takes the
+    keyframes that can no longer change after each batch. The split mode
+    passes a CandidateRecorder as `sink`, so candidates are recorded for
+    replay instead of going to the scheduler.
+    """
+
+    def __init__(
+        self,
+        viseme_map: dict[str, int],
+        stats: bool = False,
+        sink: CandidateSink | None = None,
+    ):
+        self.scheduler = KeyframeScheduler(viseme_map, min_hold_frames)
+        self.sink: CandidateSink = sink or self.scheduler
+        self.stats = stats
+        self.stats_data: dict[str, int] = {}
+        self.current_frame = 0
+        self.prev_word: Word | None = None
+
+    def add_to_output(self, frame_num: int, viseme: str):
+        self.sink.add(frame_num, viseme)
+        if self.stats:
+            self.stats_data[viseme] = self.stats_data.get(viseme, 0) + 1
 
     def place_syllable_visemes(
+        self,
         syl_visemes: list[str],
         syl_start: float,
         syl_end: float,
@@ -204,7 +556,7 @@ def calc_frame_data(
         # If we can't even fit one viseme, place only the primary vowel
         if available_frames < min_hold_frames:
             frame_idx = effective_start
-            add_to_output(frame_idx, pick_primary_vowel(syl_visemes))
+            self.add_to_output(frame_idx, pick_primary_vowel(syl_visemes))
             return frame_idx
 
         # Weighted duration within this syllable
@@ -240,47 +592,45 @@ def calc_frame_data(
             if frame_idx > syl_end_frame:
                 break
 
-            add_to_output(frame_idx, viseme)
+            self.add_to_output(frame_idx, viseme)
             local_frame = frame_idx
             local_time += v_dur
 
         return local_frame
 
-    # --- Initial silence ---
-    if words and words[0].start_time > 0.01:
-        add_to_output(0, "sli")
-
-    current_frame = 0
-
-    for index, word in enumerate(words):
-        phoneme_data = phonemes[index]
+    def place_word(self, word: Word, phoneme_data: Any) -> None:
+        prev_word = self.prev_word
+        self.prev_word = word
 
         word_start_frame = calc_frame(word.start_time)
 
         # --- Silence for gaps ---
-        if index == 0:
+        if prev_word is None:
+            # --- Initial silence ---
+            if word.start_time > 0.01:
+                self.add_to_output(0, "sli")
+
             if word.start_time > silence_seconds:
                 sli_frame = max(
-                    current_frame + min_hold_frames,
+                    self.current_frame + min_hold_frames,
                     calc_frame(word.start_time - 0.03),
                 )
-                add_to_output(sli_frame, "sli")
-                current_frame = sli_frame
+                self.add_to_output(sli_frame, "sli")
+                self.current_frame = sli_frame
         else:
-            prev_word = words[index - 1]
             gap = word.start_time - prev_word.end_time
             if gap >= silence_seconds:
                 sli_frame = calc_frame(prev_word.end_time + 0.02)
-                if sli_frame < current_frame + min_hold_frames:
-                    sli_frame = current_frame + min_hold_frames
-                add_to_output(sli_frame, "sli")
-                current_frame = sli_frame
+                if sli_frame < self.current_frame + min_hold_frames:
+                    sli_frame = self.current_frame + min_hold_frames
+                self.add_to_output(sli_frame, "sli")
+                self.current_frame = sli_frame
 
-        current_frame = max(current_frame, word_start_frame)
+        self.current_frame = max(self.current_frame, word_start_frame)
 
         duration = word.end_time - word.start_time
         if duration <= 0:
-            continue
+            return
 
         # --- Detect grouped (Chinese) vs flat (English) ---
         is_grouped = (
@@ -295,7 +645,7 @@ def calc_frame_data(
             syllable_groups: list[list[str]] = phoneme_data
             num_syls = len(syllable_groups)
             if num_syls == 0:
-                continue
+                return
 
             syl_duration = duration / num_syls
 
@@ -307,8 +657,8 @@ def calc_frame_data(
                 syl_start = word.start_time + syl_idx * syl_duration
                 syl_end = syl_start + syl_duration
 
-                current_frame = place_syllable_visemes(
-                    syl_visemes, syl_start, syl_end, current_frame
+                self.current_frame = self.place_syllable_visemes(
+                    syl_visemes, syl_start, syl_end, self.current_frame
                 )
         else:
             # English or flat: treat entire word as one syllable
@@ -317,40 +667,417 @@ def calc_frame_data(
             )
             word_visemes = get_visemes(flat_phonemes)
             if not word_visemes:
-                continue
+                return
 
-            current_frame = place_syllable_visemes(
-                word_visemes, word.start_time, word.end_time, current_frame
+            self.current_frame = self.place_syllable_visemes(
+                word_visemes, word.start_time, word.end_time, self.current_frame
             )
 
-    # --- Final silence ---
-    if words:
-        last_end_frame = calc_frame(words[-1].end_time)
-        sli_frame = max(current_frame + min_hold_frames, last_end_frame + 1)
-        add_to_output(sli_frame, "sli")
-
-    # --- Post-processing: deduplicate + enforce min gap ---
-    sorted_frames = sorted(output.items())
-    final: list[tuple[int, int]] = []
-    for frame_num, viseme_id in sorted_frames:
-        if final:
-            if final[-1][1] == viseme_id:
-                continue
-            if frame_num - final[-1][0] < min_hold_frames:
-                continue
-        final.append((frame_num, viseme_id))
+    def take_finished(self) -> list[tuple[int, str]]:
+        """Hand over the keyframes that later words can no longer change.
+
+        Every later candidate lands at or after current_frame, and only the
+        newest keyframe can still be replaced by one of them.
+        """
+        keyframes = self.scheduler.flush(before=self.current_frame)
+        finished = keyframes[:-1]
+        del keyframes[:-1]
+        return finished
+
+    def finish(self) -> list[tuple[int, str]]:
+        """Add the final silence and return the remaining keyframes."""
+        # --- Final silence ---
+        if self.prev_word is not None:
+            last_end_frame = calc_frame(self.prev_word.end_time)
+            sli_frame = max(self.current_frame + min_hold_frames, last_end_frame + 1)
+            self.add_to_output(sli_frame, "sli")
+
+        # --- Resolve collisions, deduplicate + enforce min gap ---
+        return self.scheduler.flush()
+
+    def print_stats(self) -> None:
+        sorted_vieseme_stats_data = sorted(
+            self.stats_data.items(), key=lambda x: x[1], reverse=True
+        )
+        pprint(sorted_vieseme_stats_data)
+
+
+def format_frame_data(keyframes: list[tuple[int, int]]) -> str:
+    return "\n".join([f"{f} {v}" for f, v in keyframes])
+
+
+def transition_rank(viseme: str, prev_viseme: str | None) -> int:
+    """How much removing a keyframe of `viseme` costs, lowest first:
+    vowel after vowel, other vowels, consonants, closures and silences."""
+    viseme = phoneme_to_viseme.rhubarb_to_viseme.get(viseme, viseme)
+    if phoneme_to_viseme.is_unskippable(viseme):
+        return 3
+    if viseme not in VOWEL_VISEMES:
+        return 2
+    if prev_viseme is None:
+        return 1
+    prev_viseme = phoneme_to_viseme.rhubarb_to_viseme.get(prev_viseme, prev_viseme)
+    return 0 if prev_viseme in VOWEL_VISEMES else 1
+
+
+def simplify_keyframes(
+    keyframes: list[tuple[int, str]], viseme_map: dict[str, int], budget: int
+) -> list[tuple[int, str]]:
+    """Drop keyframes until at most `budget` are left.
+
+    The cheapest keyframe by `transition_rank`, then by how briefly it
+    shows, goes first; the previous keyframe then holds in its place. A
+    keyframe left showing the same viseme id as its new predecessor is
+    dropped with it. The first keyframe is always kept.
+    """
+    count = len(keyframes)
+    prev = list(range(-1, count - 1))
+    next_ = list(range(1, count + 1))
+    alive = [True] * count
+    version = [0] * count
+    ids = [viseme_map.get(v) for _, v in keyframes]
+    left = count
+
+    def cost(i: int) -> tuple[int, int, int, int, int]:
+        frame_num, viseme = keyframes[i]
+        n = next_[i]
+        hold = keyframes[n][0] - frame_num if n < count else 1
+        rank = transition_rank(viseme, keyframes[prev[i]][1])
+        return (rank, hold, frame_num, i, version[i])
+
+    def remove(i: int) -> None:
+        nonlocal left
+        alive[i] = False
+        left -= 1
+        p, n = prev[i], next_[i]
+        next_[p] = n
+        if n < count:
+            prev[n] = p
+
+    heap = [cost(i) for i in range(1, count)]
+    heapq.heapify(heap)
+    while left > budget and heap:
+        *_, i, v = heapq.heappop(heap)
+        if not alive[i] or v != version[i]:
+            continue
+
+        p, n = prev[i], next_[i]
+        remove(i)
+        if n < count and ids[n] == ids[p]:
+            n_next = next_[n]
+            remove(n)
+            n = n_next
+        # The previous keyframe now holds longer, the next follows another
+        for j in (p, n):
+            if 0 < j < count:
+                version[j] += 1
+                heapq.heappush(heap, cost(j))
+
+    return [keyframe for keyframe, kept in zip(keyframes, alive) if kept]
+
+
+def budget_keyframes(
+    keyframes: list[tuple[int, str]], viseme_map: dict[str, int], frame_rate: int
+) -> list[tuple[int, str]]:
+    """Apply the --max-keys and --max-keys-per-second budgets, if any."""
+    budgets: list[int] = []
+    if max_keys > 0:
+        budgets.append(max_keys)
+    if max_keys_per_second > 0 and keyframes:
+        seconds = max(keyframes[-1][0], 1) / frame_rate
+        budgets.append(max(1, int(max_keys_per_second * seconds)))
+    if not budgets or len(keyframes) <= min(budgets):
+        return keyframes
+
+    start = time.perf_counter()
+    simplified = simplify_keyframes(keyframes, viseme_map, min(budgets))
+    logging.info(
+        f"Keyframe budget: removed {len(keyframes) - len(simplified)} of "
+        f"{len(keyframes)} keys in {(time.perf_counter() - start) * 1000:.1f}ms."
+    )
+
+    return simplified
+
+
+def calc_keyframes(
+    words: list[Word], phonemes: list[Any], viseme_map: dict[str, int], stats: bool
+) -> list[tuple[int, int]]:
+    """(frame, viseme id) keyframes for a transcript."""
+    logging.info("Calculating frame data...")
+
+    placer = VisemePlacer(viseme_map, stats)
+    for index, word in enumerate(words):
+        placer.place_word(word, phonemes[index])
 
-    frame_data = "\n".join([f"{f} {v}" for f, v in final])
+    named_keyframes = budget_keyframes(placer.finish(), viseme_map, frame)
+    keyframes = [(f, viseme_map[v]) for f, v in named_keyframes]
 
     logging.info("Calculate frame data.")
 
     if stats:
-        sorted_vieseme_stats_data = sorted(
-            vieseme_stats_data.items(), key=lambda x: x[1], reverse=True
-        )
-        pprint(sorted_vieseme_stats_data)
+        placer.print_stats()
+
+    return keyframes
+
+
+def calc_frame_data(
+    words: list[Word], phonemes: list[Any], viseme_map: dict[str, int], stats: bool
+) -> str:
+    return format_frame_data(calc_keyframes(words, phonemes, viseme_map, stats))
+
+
+class CandidateRecorder:
+    """A CandidateSink that records candidates in order, so they can be
+    replayed into the real scheduler later."""
+
+    def __init__(self):
+        self.candidates: list[tuple[int, str]] = []
+
+    def add(self, frame_num: int, viseme: str) -> None:
+        self.candidates.append((frame_num, viseme))
+
+
+def split_at_silences(words: list[Word], parts: int) -> list[int]:
+    """Start indices of about `parts` runs of words, cut only at gaps of at
+    least silence_seconds that also start a phrase."""
+    target = max(1, len(words) // max(1, parts))
+    starts = [0]
+    for index in range(1, len(words)):
+        gap = words[index].start_time - words[index - 1].end_time
+        if (
+            gap >= max(silence_seconds, PHRASE_GAP_SECONDS)
+            and index - starts[-1] >= target
+        ):
+            starts.append(index)
+
+    return starts
+
+
+def _init_split_worker(
+    frame_: int,
+    hold_frames: int,
+    silence: float,
+    cache_handle: tuple[str, Any],
+    lexicon_file: str | None,
+) -> None:
+    global frame, min_hold_frames, silence_seconds
+    frame, min_hold_frames, silence_seconds = frame_, hold_frames, silence
+    _init_pipeline_worker(cache_handle, lexicon_file)
+
+
+def _init_pipeline_worker(
+    cache_handle: tuple[str, Any], lexicon_file: str | None
+) -> None:
+    phoneme_cache.attach(cache_handle)
+    lexicon.attach(lexicon_file)
+
 
-    return frame_data
+def lexicon_file() -> str | None:
+    """The lexicon this process uses, for worker initializers."""
+    return lexicon.active.filename if lexicon.active is not None else None
+
+
+def _place_partition(
+    words: list[Word],
+    words_only_text: list[str],
+    language: str,
+    prev_word: Word | None,
+) -> tuple[list[Any], list[tuple[int, str]], int]:
+    """Phonemize and place one partition, assuming the previous one ended
+    early enough not to push the silence keyframe before its first word."""
+    phonemes = get_phonemes(words_only_text, language, phrase_starts(words))
+    recorder = CandidateRecorder()
+    placer = VisemePlacer({}, sink=recorder)
+    placer.prev_word = prev_word
+    if prev_word is not None:
+        placer.current_frame = _partition_start_frame(prev_word)
+    for word, phoneme_data in zip(words, phonemes):
+        placer.place_word(word, phoneme_data)
+
+    return phonemes, recorder.candidates, placer.current_frame
+
+
+def _partition_start_frame(prev_word: Word) -> int:
+    """The latest current_frame that leaves the gap silence after `prev_word`
+    where it would be anyway."""
+    return calc_frame(prev_word.end_time + 0.02) - min_hold_frames
+
+
+def calc_keyframes_split(
+    words: list[Word],
+    words_only_text: list[str],
+    viseme_map: dict[str, int],
+    language: str,
+    stats: bool,
+    jobs: int | None = None,
+) -> list[tuple[int, int]]:
+    """get_phonemes + calc_keyframes, spread over processes.
+
+    Runs of words separated by at least silence_seconds only share the
+    current_frame carried over the silence keyframe between them. Each run
+    is phonemized and placed on its own worker, assuming that silence
+    keyframe isn't pushed back by the previous run. Merging replays the
+    candidates in order; a run whose assumption turns out wrong is placed
+    again from its phonemes. The result is identical to the sequential one.
+    """
+    logging.info("Calculating frame data (split at silences)...")
+
+    jobs = jobs or os.cpu_count() or 1
+    starts = split_at_silences(words, jobs * 4)
+    ends = starts[1:] + [len(words)]
+
+    with (
+        phoneme_cache.SharedPhonemeCache.create() as cache,
+        ProcessPoolExecutor(
+            max_workers=jobs,
+            initializer=_init_split_worker,
+            initargs=(
+                frame,
+                min_hold_frames,
+                silence_seconds,
+                cache.handle,
+                lexicon_file(),
+            ),
+        ) as executor,
+    ):
+        futures = [
+            executor.submit(
+                _place_partition,
+                words[start:end],
+                words_only_text[start:end],
+                language,
+                words[start - 1] if start > 0 else None,
+            )
+            for start, end in zip(starts, ends)
+        ]
+
+        placer = VisemePlacer(viseme_map, stats)
+        replaced = 0
+        for start, end, future in zip(starts, ends, futures):
+            phonemes, candidates, end_frame = future.result()
+            if start > 0 and placer.current_frame > _partition_start_frame(
+                words[start - 1]
+            ):
+                # Boundary fix-up: the previous run ended too late
+                replaced += 1
+                for word, phoneme_data in zip(words[start:end], phonemes):
+                    placer.place_word(word, phoneme_data)
+                continue
+
+            for frame_num, viseme in candidates:
+                placer.add_to_output(frame_num, viseme)
+            placer.current_frame = end_frame
+            placer.prev_word = words[end - 1]
+
+        phoneme_cache.log_counters(cache)
+
+    named_keyframes = budget_keyframes(placer.finish(), viseme_map, frame)
+    keyframes = [(f, viseme_map[v]) for f, v in named_keyframes]
+
+    logging.info(
+        f"Calculate frame data. {len(starts)} partitions, {replaced} placed again."
+    )
+
+    if stats:
+        placer.print_stats()
+
+    return keyframes
+
+
+def run_pipeline(
+    input_file: str,
+    targets: list[tuple[str, str]],
+    viseme_map: dict[str, int],
+    language: str,
+    stats: bool = False,
+    batch_size: int = 64,
+    jobs: int | None = None,
+) -> None:
+    """Whisper mode with the stages overlapped.
+
+    A loader thread cuts the transcript into batches of whole phrases and
+    submits them to a phonemizer process pool, a placement thread consumes
+    the results in order, and the writer (this thread) streams finished
+    keyframes to the exporters for `targets`. Bounded queues between the
+    stages keep memory flat. The output is identical to calc_keyframes + exporters.export.
+    """
+    logging.info("Calculating frame data (pipelined)...")
+
+    words, words_only_text = get_words_data(input_file)
+    jobs = jobs or os.cpu_count() or 1
+    phoneme_queue: queue.Queue[tuple[list[Word], Future[list[Any]]] | None] = (
+        queue.Queue(maxsize=jobs * 2)
+    )
+    keyframe_queue: queue.Queue[list[tuple[int, str]] | None] = queue.Queue(maxsize=16)
+    errors: list[BaseException] = []
+    placer = VisemePlacer(viseme_map, stats)
+
+    def load(executor: ProcessPoolExecutor) -> None:
+        try:
+            # Batches of whole phrases, at least batch_size words each
+            starts = phrase_starts(words)
+            batch_starts = starts[:1]
+            for start in starts[1:]:
+                if start - batch_starts[-1] >= batch_size:
+                    batch_starts.append(start)
+            for start, end in zip(batch_starts, batch_starts[1:] + [len(words)]):
+                future = executor.submit(
+                    get_phonemes,
+                    words_only_text[start:end],
+                    language,
+                    phrase_starts(words[start:end]),
+                )
+                phoneme_queue.put((words[start:end], future))
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            phoneme_queue.put(None)
+
+    def place() -> None:
+        try:
+            while (item := phoneme_queue.get()) is not None:
+                batch_words, future = item
+                for word, phoneme_data in zip(batch_words, future.result()):
+                    placer.place_word(word, phoneme_data)
+                keyframe_queue.put(placer.take_finished())
+            keyframe_queue.put(placer.finish())
+        except BaseException as e:
+            errors.append(e)
+            # Unblock the loader so it can finish
+            while phoneme_queue.get() is not None:
+                pass
+        finally:
+            keyframe_queue.put(None)
+
+    with (
+        exporters.ExportSet(targets, frame) as exports,
+        phoneme_cache.SharedPhonemeCache.create() as cache,
+        ProcessPoolExecutor(
+            max_workers=jobs,
+            initializer=_init_pipeline_worker,
+            initargs=(cache.handle, lexicon_file()),
+        ) as executor,
+    ):
+        loader = threading.Thread(target=load, args=(executor,))
+        placement = threading.Thread(target=place)
+        loader.start()
+        placement.start()
+
+        while (keyframes := keyframe_queue.get()) is not None:
+            for frame_num, viseme in keyframes:
+                exports.write(frame_num, viseme_map[viseme])
+
+        loader.join()
+        placement.join()
+        phoneme_cache.log_counters(cache)
+        # Inside the block, so the exports are discarded instead of finished
+        if errors:
+            raise errors[0]
+
+    logging.info("Write frame data.")
+
+    if stats:
+        placer.print_stats()
 
 
 def check_rhubarb():
@@ -360,9 +1087,155 @@ def check_rhubarb():
         )
 
 
-def run_rhubarb(audio_file: str, output_file: str):
-    check_rhubarb()
-    cmd = [
+def pcm_to_16bit(data: bytes, width: int) -> array:
+    """Little-endian PCM samples of `width` bytes as 16-bit samples."""
+    if width == 1:
+        # 8-bit WAV is unsigned
+        return array("h", [(b - 128) << 8 for b in data])
+    if width == 2:
+        return array("h", data)
+    if width == 3:
+        # Pad every sample to 32 bits with a zero low byte
+        padded = bytearray(len(data) // 3 * 4)
+        for i in range(3):
+            padded[i + 1 :: 4] = data[i::3]
+        data = bytes(padded)
+    return array("h", [s >> 16 for s in array("i", data)])
+
+
+def pcm_to_float(data: bytes, width: int) -> Any:
+    """Little-endian PCM samples of `width` bytes as floats on the 16-bit scale."""
+    assert np is not None
+    if width == 1:
+        return (np.frombuffer(data, np.uint8).astype(np.float64) - 128) * 256
+    if width == 2:
+        return np.frombuffer(data, "<i2").astype(np.float64)
+    if width == 3:
+        raw = np.frombuffer(data, np.uint8).reshape(-1, 3).astype(np.uint32)
+        samples = (raw[:, 0] << 8 | raw[:, 1] << 16 | raw[:, 2] << 24).view(np.int32)
+        return samples / 65536
+    return np.frombuffer(data, "<i4") / 65536
+
+
+def lowpass_taps(factor: int) -> Any:
+    """Blackman windowed sinc low-pass for decimating by `factor`.
+
+    The cutoff sits at 90% of the output Nyquist frequency. 48 * factor + 1
+    taps keep the filter linear phase with a whole number of output samples
+    of delay, which `preprocess_audio` removes.
+    """
+    assert np is not None
+    half = 24 * factor
+    cutoff = 0.9 * 0.5 / factor  # Cycles per input sample
+    n = np.arange(-half, half + 1)
+    taps = 2 * cutoff * np.sinc(2 * cutoff * n) * np.blackman(2 * half + 1)
+    return taps / taps.sum()
+
+
+def preprocess_audio(
+    audio_file: str, output_file: str, sample_rate: int = rhubarb_sample_rate
+) -> bool:
+    """Downmix a PCM WAV to mono and reduce its sample rate for Rhubarb.
+
+    The file is streamed in chunks. With NumPy, the mono signal is
+    low-pass filtered and decimated by `factor`, the largest integer that
+    keeps the rate at or above `sample_rate`; Rhubarb resamples whatever
+    is left itself. Without NumPy the file is only downmixed, and that is
+    logged once.
+
+    Returns False if the file can't be handled here (not an 8/16/24/32-bit
+    PCM WAV, or nothing to do); the caller should then pass the original
+    file to Rhubarb.
+    """
+    global logged_no_resampling
+    try:
+        src = wave.open(audio_file, "rb")
+    except (wave.Error, EOFError):
+        return False
+
+    with src:
+        channels = src.getnchannels()
+        width = src.getsampwidth()
+        rate = src.getframerate()
+        factor = max(1, rate // sample_rate)
+        if np is None and factor > 1:
+            if not logged_no_resampling:
+                logging.info(
+                    "NumPy is not installed. Leaving resampling to Rhubarb; "
+                    "install the 'fast' extra to decimate here."
+                )
+                logged_no_resampling = True
+            factor = 1
+
+        if width not in (1, 2, 3, 4) or (channels == 1 and factor == 1):
+            return False
+
+        chunk_frames = factor * 65536  # Whole output samples per chunk
+
+        with wave.open(output_file, "wb") as dst:
+            dst.setnchannels(1)
+            dst.setsampwidth(2)
+            dst.setframerate(rate // factor)
+
+            if np is None:
+                while True:
+                    data = src.readframes(chunk_frames)
+                    if not data:
+                        break
+                    samples = pcm_to_16bit(data, width)
+                    mixed = array(
+                        "h",
+                        [
+                            s // channels
+                            for s in map(
+                                sum,
+                                zip(*(samples[i::channels] for i in range(channels))),
+                            )
+                        ],
+                    )
+                    dst.writeframes(mixed.tobytes())
+            else:
+                taps = lowpass_taps(factor)
+                half = len(taps) // 2
+                history = np.zeros(2 * half)
+                position = 0  # Input samples read so far
+                next_output = 0  # Input sample the next output sample is centered on
+                flushed = False
+                while not flushed:
+                    data = src.readframes(chunk_frames)
+                    if data:
+                        mono = pcm_to_float(data, width).reshape(-1, channels)
+                        mono = mono.mean(axis=1)
+                    else:
+                        # Zeros past the end let the filter reach the last samples
+                        mono, flushed = np.zeros(half), True
+
+                    buffer = np.concatenate((history, mono))
+                    # Window w is centered on input sample position - half + w
+                    windows = np.lib.stride_tricks.sliding_window_view(
+                        buffer, len(taps)
+                    )
+                    first = next_output - position + half
+                    out = windows[first::factor] @ taps
+                    if flushed:
+                        out = out[: -(-position // factor) - next_output // factor]
+                    dst.writeframes(
+                        np.clip(np.rint(out), -32768, 32767).astype("<i2").tobytes()
+                    )
+
+                    next_output += factor * len(out)
+                    position += len(mono)
+                    history = buffer[-2 * half :]
+
+    logging.info(
+        f"Preprocessed audio: {channels}ch {rate} Hz -> 1ch {rate // factor} Hz"
+    )
+
+    return True
+
+
+def rhubarb_command(audio_file: str, output_file: str) -> list[str]:
+    return [
         "rhubarb",
         audio_file,
         "-r",
@@ -374,6 +1247,11 @@ def run_rhubarb(audio_file: str, output_file: str):
         "-o",
         output_file,
     ]
+
+
+def run_rhubarb(audio_file: str, output_file: str):
+    check_rhubarb()
+    cmd = rhubarb_command(audio_file, output_file)
     logging.info(f"Running Rhubarb: {' '.join(cmd)}")
     try:
         subprocess.run(cmd, check=True, capture_output=True)
@@ -382,6 +1260,84 @@ def run_rhubarb(audio_file: str, output_file: str):
         raise
 
 
+def get_speech_spans(
+    words: list[Word], duration: float, padding: float = span_padding_seconds
+) -> list[tuple[float, float]]:
+    """Turn word timings into padded, merged (start, end) spans of speech."""
+    spans: list[tuple[float, float]] = []
+    for word in words:
+        start = max(0.0, word.start_time - padding)
+        end = min(duration, word.end_time + padding)
+        if end <= start:
+            continue
+        if spans and start <= spans[-1][1]:
+            spans[-1] = (spans[-1][0], max(spans[-1][1], end))
+        else:
+            spans.append((start, end))
+
+    return spans
+
+
+def cut_wav(
+    audio_file: str, spans: list[tuple[float, float]], out_dir: str
+) -> list[str]:
+    """Write each span of a WAV file to its own WAV file in `out_dir`."""
+    files: list[str] = []
+    with wave.open(audio_file, "rb") as src:
+        rate = src.getframerate()
+        for index, (start, end) in enumerate(spans):
+            start_frame = round(start * rate)
+            src.setpos(start_frame)
+            data = src.readframes(round(end * rate) - start_frame)
+
+            file = os.path.join(out_dir, f"span{index}.wav")
+            with wave.open(file, "wb") as dst:
+                dst.setparams(src.getparams())
+                dst.writeframes(data)
+            files.append(file)
+
+    return files
+
+
+def run_rhubarb_spans(
+    audio_file: str,
+    words: list[Word],
+    output_file: str,
+    padding: float = span_padding_seconds,
+) -> None:
+    """Run Rhubarb only on the speech spans of a WAV file, concurrently.
+
+    The per-span results are shifted back to file time and written to
+    `output_file` as a single Rhubarb TSV, with `X` filling the gaps.
+    """
+    with wave.open(audio_file, "rb") as src:
+        duration = src.getnframes() / src.getframerate()
+
+    spans = get_speech_spans(words, duration, padding)
+    logging.info(
+        f"Running Rhubarb on {len(spans)} speech spans "
+        f"({sum(end - start for start, end in spans):.1f}s of {duration:.1f}s)."
+    )
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        span_files = cut_wav(audio_file, spans, tmp_dir)
+        tsv_files = [f"{file}.tsv" for file in span_files]
+        with ThreadPoolExecutor() as executor:
+            list(executor.map(run_rhubarb, span_files, tsv_files))
+
+        lines = ["0.000\tX"]
+        for (start, end), tsv_file in zip(spans, tsv_files):
+            with open(tsv_file) as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) >= 2:
+                        lines.append(f"{float(parts[0]) + start:.3f}\t{parts[1]}")
+            lines.append(f"{end:.3f}\tX")
+
+    with open(output_file, "w") as f:
+        f.write("\n".join(lines))
+
+
 def process_rhubarb_output(
     file_path: str,
     viseme_map: dict[str, int],
@@ -389,6 +1345,43 @@ def process_rhubarb_output(
     max_duration: float = 0,
     frame_rate: int = 30,
 ) -> str:
+    arrays = rhubarb_keyframe_arrays(
+        file_path, viseme_map, min_gap, max_duration, frame_rate
+    )
+    if arrays is not None:
+        assert np is not None  # Arrays only come back when NumPy is installed
+        frames, ids = arrays
+        if not len(frames):
+            return ""
+        pairs = np.column_stack((frames, ids)).ravel().tolist()
+        return ("%d %d\n" * len(frames) % tuple(pairs))[:-1]
+
+    return format_frame_data(
+        rhubarb_keyframes(file_path, viseme_map, min_gap, max_duration, frame_rate)
+    )
+
+
+def rhubarb_keyframes(
+    file_path: str,
+    viseme_map: dict[str, int],
+    min_gap: float = 0.05,
+    max_duration: float = 0,
+    frame_rate: int = 30,
+) -> list[tuple[int, int]]:
+    """(frame, viseme id) keyframes from a Rhubarb TSV file."""
+    arrays = rhubarb_keyframe_arrays(
+        file_path, viseme_map, min_gap, max_duration, frame_rate
+    )
+    if arrays is not None:
+        frames, ids = arrays
+        return list(zip(frames.tolist(), ids.tolist()))
+
+    return rhubarb_events_to_keyframes(
+        read_rhubarb_events(file_path), viseme_map, min_gap, max_duration, frame_rate
+    )
+
+
+def read_rhubarb_events(file_path: str) -> list[tuple[float, str]]:
     with open(file_path, "r") as f:
         lines = f.readlines()
 
@@ -408,8 +1401,19 @@ def process_rhubarb_output(
             except ValueError:
                 logging.warning(f"Skipping invalid line: {line}")
 
+    return raw_events
+
+
+def rhubarb_events_to_keyframes(
+    raw_events: list[tuple[float, str]],
+    viseme_map: dict[str, int],
+    min_gap: float = 0.05,
+    max_duration: float = 0,
+    frame_rate: int = 30,
+) -> list[tuple[int, int]]:
+    """Filter (timestamp, Rhubarb shape) events and map them to keyframes."""
     if not raw_events:
-        return ""
+        return []
 
     # 1. Min Gap Filter (Anti-jitter) using time
     stack: list[tuple[float, str]] = []
@@ -454,27 +1458,161 @@ def process_rhubarb_output(
                 final_events.append((break_t, "X"))
 
     # 3. Map to output frames
-    output_lines: list[str] = []
-    for t, vis in final_events:
-        frame_num = round(t * frame_rate)
-
+    named_keyframes = budget_keyframes(
+        [(round(t * frame_rate), vis) for t, vis in final_events],
+        viseme_map,
+        frame_rate,
+    )
+    keyframes: list[tuple[int, int]] = []
+    for frame_num, vis in named_keyframes:
         # Mapping
         val = viseme_map.get(vis)
         if val is not None:
-            output_lines.append(f"{frame_num} {val}")
+            keyframes.append((frame_num, val))
         else:
             logging.warning(f"Unknown viseme char: {vis}")
 
-    return "\n".join(output_lines)
+    return keyframes
 
 
-def write_to_file(filename: str, content: str) -> None:
-    with open(filename, "w", encoding="utf-8") as f:
-        f.write(content)
+def rhubarb_keyframe_arrays(
+    file_path: str,
+    viseme_map: dict[str, int],
+    min_gap: float = 0.05,
+    max_duration: float = 0,
+    frame_rate: int = 30,
+) -> Any:
+    """rhubarb_events_to_keyframes on arrays, as (frames, ids).
+
+    None when NumPy is missing or the file needs the event by event path:
+    non-ASCII text, lines that aren't exactly `<timestamp> <shape>`,
+    timestamps that are out of order or not finite, or a keyframe budget
+    to apply.
+    """
+    if np is None or max_keys > 0 or max_keys_per_second > 0:
+        return None
+
+    with open(file_path, "r") as f:
+        text = f.read()
+    if not text.isascii():
+        return None
+    data = np.frombuffer(text.encode(), np.uint8)
+    # Every line must hold 0 or 2 tokens; count token starts per line
+    space = (data == 32) | ((data >= 9) & (data <= 13)) | ((data >= 28) & (data <= 31))
+    starts = ~space
+    starts[1:] &= space[:-1]
+    line_tokens = np.bincount(np.cumsum(data == 10)[starts])
+    if ((line_tokens != 0) & (line_tokens != 2)).any():
+        return None
+    tokens = text.split()
+    if not tokens:
+        return np.empty(0, np.int64), np.empty(0, np.int64)
+
+    try:
+        times = np.array(tokens[0::2], dtype=np.float64)
+    except ValueError:
+        return None
+    if not np.isfinite(times).all() or (np.diff(times) < 0).any():
+        return None
+    joined = "".join(tokens[1::2])
+    if len(joined) == len(times):  # Single character shapes, as Rhubarb writes
+        chars = np.frombuffer(joined.encode(), np.uint8)
+        present = np.flatnonzero(np.bincount(chars, minlength=128))
+        table = np.zeros(128, np.uint8)
+        table[present] = np.arange(len(present))
+        shapes = [chr(c) for c in present.tolist()]
+        codes = table[chars]
+    else:
+        unique, codes = np.unique(np.array(tokens[1::2]), return_inverse=True)
+        shapes = unique.tolist()
+    if "X" not in shapes:
+        shapes.append("X")
+    if len(shapes) > 256:
+        return None
+    codes = codes.astype(np.uint8)
+    x_code = shapes.index("X")
+
+    # 1. Min gap: with sorted timestamps, the stack keeps an event exactly
+    # when the next one comes at least min_gap later
+    keep = np.ones(len(times), dtype=bool)
+    keep[:-1] = np.diff(times) >= min_gap
+    times, codes = times[keep], codes[keep]
+
+    if times[0] > 0:
+        times = np.concatenate(([0.0], times))
+        codes = np.concatenate(([x_code], codes)).astype(np.uint8)
+
+    # 2. Max duration: an X after every non-X event held too long
+    if max_duration > 0 and len(times) > 1:
+        breaks = times[:-1] + max_duration
+        insert = (
+            (codes[:-1] != x_code)
+            & (times[1:] - times[:-1] > max_duration)
+            & (breaks < times[1:])
+        )
+        if insert.any():
+            positions = np.arange(len(times))
+            positions[1:] += np.cumsum(insert)
+            merged_times = np.empty(len(times) + int(insert.sum()))
+            merged_codes = np.full(len(merged_times), x_code, np.uint8)
+            merged_times[positions] = times
+            merged_codes[positions] = codes
+            merged_times[positions[:-1][insert] + 1] = breaks[insert]
+            times, codes = merged_times, merged_codes
+
+    # 3. Map to output frames
+    lookup = np.array([viseme_map.get(shape, 0) for shape in shapes], np.int64)
+    known = np.array([shape in viseme_map for shape in shapes])[codes]
+    if not known.all():
+        for shape in sorted({shapes[code] for code in codes[~known].tolist()}):
+            logging.warning(f"Unknown viseme char: {shape}")
+        times, codes = times[known], codes[known]
+
+    return np.rint(times * frame_rate).astype(np.int64), lookup[codes]
+
+
+def write_to_file(
+    filename: str, keyframes: list[tuple[int, int]], exports: list[tuple[str, str]]
+) -> None:
+    """Write the keyframe text file, plus any other formats in `exports`,
+    in a single pass over the keyframes."""
+    exporters.export(keyframes, [("text", filename)] + exports, frame)
 
     logging.info("Write frame data.")
 
 
+def parse_exports(
+    values: list[str] | None, output_file: str, input_file: str
+) -> list[tuple[str, str]]:
+    """Turn `--export FORMAT[=PATH]` values into (format, filename) pairs.
+    Without a path, the output file name gets the format's suffix. Targets
+    that would overwrite the input or the output file are refused."""
+    reserved = {
+        Path(input_file).resolve(): "the input file",
+        Path(output_file).resolve(): "the output file",
+    }
+    targets: list[tuple[str, str]] = []
+    for value in values or []:
+        name, _, filename = value.partition("=")
+        if name not in exporters.EXPORTERS:
+            raise ValueError(
+                f"Unknown export format: {name}. "
+                f"Available: {', '.join(exporters.EXPORTERS)}"
+            )
+        if not filename:
+            filename = str(
+                Path(output_file).with_suffix(exporters.EXPORTERS[name].suffix)
+            )
+        if Path(filename).resolve() in reserved:
+            raise ValueError(
+                f"The {name} export would overwrite "
+                f"{reserved[Path(filename).resolve()]}: {filename}"
+            )
+        targets.append((name, filename))
+
+    return targets
+
+
 def setup_argparse():
     parser = argparse.ArgumentParser(
         description="A simple script to 2d lip sync frame data from whisper json data."
@@ -501,6 +1639,21 @@ def setup_argparse():
         default=max_duration_seconds,
         type=float,
     )
+    parser.add_argument(
+        "--max-keys",
+        help=(
+            "Keyframe budget. Vowel-to-vowel flips are dropped first, closures "
+            "and silences last. 0 for no limit."
+        ),
+        default=max_keys,
+        type=int,
+    )
+    parser.add_argument(
+        "--max-keys-per-second",
+        help="Keyframe budget per second of animation, like --max-keys.",
+        default=max_keys_per_second,
+        type=float,
+    )
     parser.add_argument(
         "--viseme_map",
         "-m",
@@ -514,7 +1667,85 @@ def setup_argparse():
         default="en",
     )
     parser.add_argument("--stats", "-t", help="Print stats", action="store_true")
-    parser.add_argument("input_file", help="The path to the whisper json file.")
+    parser.add_argument(
+        "--export",
+        "-e",
+        help=(
+            "Also write another format, as FORMAT or FORMAT=PATH. Can be repeated. "
+            f"Formats: {', '.join(exporters.EXPORTERS)}."
+        ),
+        action="append",
+    )
+    parser.add_argument(
+        "--timeline",
+        help="Also save the keyframes as an indexed timeline file for fast lookups.",
+    )
+    parser.add_argument(
+        "--pipeline",
+        help="Overlap phonemizing, frame placement and writing (Whisper mode).",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--split",
+        help="Split the transcript at silences and process the parts in parallel (Whisper mode).",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        help="Number of worker processes. Default is the number of CPUs with "
+        "--pipeline, --split and --watch. Otherwise the number of phonemizer "
+        "processes, default 1.",
+        type=int,
+    )
+    parser.add_argument(
+        "--lexicon",
+        help="Prebuilt word lexicon. Words found in it are not sent to espeak.",
+    )
+    parser.add_argument(
+        "--build-lexicon",
+        help=(
+            "Phonemize the words in input_file (Whisper JSON or a word list) "
+            "and write them to the --lexicon file."
+        ),
+        action="store_true",
+    )
+    parser.add_argument(
+        "--watch",
+        help="Treat input_file as a directory and regenerate outputs whose inputs change.",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--watch-interval",
+        help="Seconds between directory polls in watch mode.",
+        default=1.0,
+        type=float,
+    )
+    parser.add_argument(
+        "--debounce-seconds",
+        help="How long a file must be left unchanged before watch mode uses it.",
+        default=0.5,
+        type=float,
+    )
+    parser.add_argument(
+        "--whisper-json",
+        help="Whisper JSON for the audio file. Rhubarb then only analyzes the speech spans.",
+    )
+    parser.add_argument(
+        "--span-padding-seconds",
+        help="Padding around each speech span when using --whisper-json (seconds).",
+        default=span_padding_seconds,
+        type=float,
+    )
+    parser.add_argument(
+        "--no-preprocess",
+        help="Pass audio to Rhubarb unchanged instead of downmixing and resampling it first.",
+        action="store_true",
+    )
+    parser.add_argument(
+        "input_file",
+        help="The path to the whisper json or audio file, or the directory to watch.",
+    )
 
     args = parser.parse_args()
 
@@ -523,69 +1754,362 @@ def setup_argparse():
 
 # ======= Main ========
 
+AUDIO_SUFFIXES = [".wav", ".ogg"]
 
-def main():
-    args = setup_argparse()
 
+def apply_args(args: argparse.Namespace) -> None:
+    """Set the module-level parameters from the command line arguments."""
     global frame
     global min_gap_seconds
     global silence_seconds
     global min_hold_frames
     global max_duration_seconds
+    global max_keys
+    global max_keys_per_second
+    global phonemize_jobs
+
+    frame = int(args.frame)
+    min_gap_seconds = float(args.min_gap_seconds)
+    silence_seconds = float(args.silence_seconds)
+    max_duration_seconds = float(args.max_duration_seconds)
+    max_keys = int(args.max_keys)
+    max_keys_per_second = float(args.max_keys_per_second)
+
+    # Update min_hold_frames based on min_gap_seconds
+    min_hold_frames = max(1, round(min_gap_seconds * frame))
+
+    # Worker processes already use the cores; don't fan out again inside them
+    if args.pipeline or args.split or args.watch:
+        phonemize_jobs = 1
+    else:
+        phonemize_jobs = args.jobs or 1
+
+    lexicon.attach(None if args.build_lexicon else args.lexicon)
+    if lexicon.active is not None:
+        logging.info(f"Using lexicon {args.lexicon} ({lexicon.active.count} words).")
+
+
+def resolve_viseme_map(args: argparse.Namespace, audio: bool) -> str:
+    map_file = args.viseme_map
+    # If the user used the default map file, and it's an audio file,
+    # prefer rhubarb_map.json if it exists.
+    if audio and map_file == "viseme_map.json" and Path("rhubarb_map.json").exists():
+        map_file = "rhubarb_map.json"
+
+    return map_file
+
+
+def generate(input_file: str, output_file: str, args: argparse.Namespace) -> None:
+    """Generate the frame data file for one Whisper JSON or audio file."""
+    _generate(input_file, output_file, args)
+
+    if args.timeline:
+        with open(output_file, encoding="utf-8") as f:
+            Timeline.from_frame_data(f.read(), frame).save(args.timeline)
+        logging.info(f"Write timeline: {args.timeline}")
+
+
+def _generate(input_file: str, output_file: str, args: argparse.Namespace) -> None:
+    input_path = Path(input_file)
+    suffix = input_path.suffix.lower()
+    exports = parse_exports(args.export, output_file, input_file)
+
+    if suffix in AUDIO_SUFFIXES:
+        # Rhubarb mode
+        logging.info("Detected audio file. Using Rhubarb Lip Sync.")
+
+        map_file = resolve_viseme_map(args, audio=True)
+        if map_file != args.viseme_map:
+            logging.info(f"Using {map_file} for audio input.")
+        viseme_map = read_viseme_map(map_file)
+
+        # Temporary output file for Rhubarb
+        fd, temp_name = tempfile.mkstemp(suffix=".tsv")
+        os.close(fd)
+        temp_dat = Path(temp_name)
+        temp_wav: Path | None = None
+        rhubarb_input = str(input_path)
+        try:
+            if suffix == ".wav" and not args.no_preprocess:
+                fd, temp_name = tempfile.mkstemp(suffix=".wav")
+                os.close(fd)
+                temp_wav = Path(temp_name)
+                if preprocess_audio(rhubarb_input, temp_name):
+                    rhubarb_input = temp_name
+
+            if args.whisper_json and suffix == ".wav":
+                words, _ = get_words_data(args.whisper_json)
+                run_rhubarb_spans(
+                    rhubarb_input,
+                    words,
+                    str(temp_dat),
+                    padding=args.span_padding_seconds,
+                )
+            else:
+                if args.whisper_json:
+                    logging.warning(
+                        "Speech spans need a .wav file. Running Rhubarb on the whole file."
+                    )
+                run_rhubarb(rhubarb_input, str(temp_dat))
+            keyframes = rhubarb_keyframes(
+                str(temp_dat),
+                viseme_map,
+                min_gap=min_gap_seconds,
+                max_duration=max_duration_seconds,
+                frame_rate=frame,
+            )
+            write_to_file(output_file, keyframes, exports)
+        finally:
+            for temp_file in (temp_dat, temp_wav):
+                if temp_file is not None and temp_file.exists():
+                    try:
+                        temp_file.unlink()
+                    except OSError:
+                        pass
 
-    if args.input_file:
-        frame = int(args.frame)
-        min_gap_seconds = float(args.min_gap_seconds)
-        silence_seconds = float(args.silence_seconds)
-        max_duration_seconds = float(args.max_duration_seconds)
+    else:
+        # Existing Whisper/Json mode
+        viseme_map = read_viseme_map(args.viseme_map)
+        if args.split:
+            words, words_only_text = get_words_data(input_file)
+            keyframes = calc_keyframes_split(
+                words, words_only_text, viseme_map, args.language, args.stats, args.jobs
+            )
+            write_to_file(output_file, keyframes, exports)
+            return
+
+        if args.pipeline and (max_keys or max_keys_per_second):
+            logging.warning("A keyframe budget needs all keyframes. Not pipelining.")
+        elif args.pipeline:
+            run_pipeline(
+                input_file,
+                [("text", output_file)] + exports,
+                viseme_map,
+                args.language,
+                args.stats,
+                jobs=args.jobs,
+            )
+            return
 
-        # Update min_hold_frames based on min_gap_seconds
-        min_hold_frames = max(1, round(min_gap_seconds * frame))
+        words, words_only_text = get_words_data(input_file)
+        phonemes = get_phonemes(words_only_text, args.language, phrase_starts(words))
+        keyframes = calc_keyframes(words, phonemes, viseme_map, args.stats)
+        write_to_file(output_file, keyframes, exports)
 
-        logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 
-        input_path = Path(args.input_file)
-        suffix = input_path.suffix.lower()
+# ======= Watch mode ========
 
-        if suffix in [".wav", ".ogg"]:
-            # Rhubarb mode
-            logging.info("Detected audio file. Using Rhubarb Lip Sync.")
+MANIFEST_NAME = ".lipsync-manifest.json"
+WATCH_OUTPUT_SUFFIX = ".lipsync"  # Before the format suffix of watch outputs
 
-            map_file = args.viseme_map
-            # If the user used the default map file, and it's an audio file,
-            # prefer rhubarb_map.json if it exists.
-            if map_file == "viseme_map.json" and Path("rhubarb_map.json").exists():
-                logging.info("Using rhubarb_map.json for audio input.")
-                map_file = "rhubarb_map.json"
 
-            viseme_map = read_viseme_map(map_file)
+def file_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1 << 20):
+            digest.update(chunk)
 
-            # Temporary output file for Rhubarb
-            temp_dat = input_path.with_suffix(".tsv")
-            try:
-                run_rhubarb(str(input_path), str(temp_dat))
-                frame_data = process_rhubarb_output(
-                    str(temp_dat),
-                    viseme_map,
-                    min_gap=min_gap_seconds,
-                    max_duration=max_duration_seconds,
-                    frame_rate=frame,
-                )
-                write_to_file(args.output, frame_data)
-            finally:
-                if temp_dat.exists():
-                    try:
-                        temp_dat.unlink()
-                    except OSError:
-                        pass
+    return digest.hexdigest()
+
+
+def find_watch_inputs(
+    directory: Path, known: dict[Path, tuple[float, int, bool]]
+) -> list[Path]:
+    """Whisper JSON and audio files in `directory`. Other JSON files (viseme
+    maps, the manifest, exports) are recognized by not having Whisper
+    segments. `known` holds (mtime, size, is input) per JSON file between
+    calls, so a file is only read again once it changes."""
+    inputs: list[Path] = []
+    classified: dict[Path, tuple[float, int, bool]] = {}
+    for path in sorted(directory.iterdir()):
+        suffix = path.suffix.lower()
+        if (
+            not path.is_file()
+            or path.name == MANIFEST_NAME
+            or path.stem.endswith(WATCH_OUTPUT_SUFFIX)
+        ):
+            continue
+        if suffix in AUDIO_SUFFIXES:
+            inputs.append(path)
+        elif suffix == ".json":
+            stat = path.stat()
+            entry = known.get(path)
+            if entry is None or entry[:2] != (stat.st_mtime, stat.st_size):
+                with open(path, "rb") as f:
+                    entry = (stat.st_mtime, stat.st_size, b'"segments"' in f.read())
+            classified[path] = entry
+            if entry[2]:
+                inputs.append(path)
+
+    known.clear()
+    known.update(classified)
+
+    return inputs
+
+
+def watch_output(input_path: Path) -> Path:
+    """`<name>.lipsync.txt` for the input file `<name>`. Keeping the input's
+    suffix in the name gives clip.wav and clip.ogg their own outputs, and
+    exports can't land on a clip.json input."""
+    return input_path.with_name(f"{input_path.name}{WATCH_OUTPUT_SUFFIX}.txt")
+
+
+def watch_dependencies(input_path: Path, args: argparse.Namespace) -> dict[str, str]:
+    """Everything an output depends on: input content, viseme map, lexicon,
+    parameters and export targets."""
+    audio = input_path.suffix.lower() in AUDIO_SUFFIXES
+    params: dict[str, Any] = {
+        "frame": frame,
+        "min_gap_seconds": min_gap_seconds,
+        "silence_seconds": silence_seconds,
+        "max_duration_seconds": max_duration_seconds,
+        "max_keys": max_keys,
+        "max_keys_per_second": max_keys_per_second,
+        "exports": parse_exports(
+            args.export, str(watch_output(input_path)), str(input_path)
+        ),
+    }
+    if audio:
+        params["preprocess"] = not args.no_preprocess
+        params["span_padding_seconds"] = args.span_padding_seconds
+    else:
+        params["language"] = args.language
+
+    deps = {
+        "input": file_hash(input_path),
+        "viseme_map": file_hash(Path(resolve_viseme_map(args, audio))),
+        "params": json.dumps(params, sort_keys=True),
+    }
+    if args.lexicon and not audio:
+        deps["lexicon"] = file_hash(Path(args.lexicon))
+
+    return deps
+
+
+def _init_watch_worker(args: argparse.Namespace, cache_handle: tuple[str, Any]) -> None:
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    apply_args(args)
+    phoneme_cache.attach(cache_handle)
+
+
+def watch(directory: Path, args: argparse.Namespace) -> None:
+    """Regenerate stale outputs in `directory` whenever their inputs change.
+
+    The directory is polled every `args.watch_interval` seconds. A file is
+    only looked at once it has been left alone for `args.debounce_seconds`,
+    so a burst of saves causes one regeneration. Outputs whose recorded
+    dependencies (see `watch_dependencies`) still match the manifest are
+    skipped. Regenerations run on a process pool.
+    """
+    manifest_path = directory / MANIFEST_NAME
+    manifest: dict[str, dict[str, str]] = {}
+    if manifest_path.exists():
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+    # Whisper inputs are processed sequentially inside each worker
+    args.pipeline = False
+    args.split = False
+    if args.timeline:
+        logging.warning("--timeline names a single file and is ignored in watch mode.")
+        args.timeline = None
+    if args.whisper_json:
+        logging.warning(
+            "--whisper-json names a single transcript and is ignored in watch mode."
+        )
+        args.whisper_json = None
+    if any("=" in value for value in args.export or []):
+        logging.warning(
+            "Export paths name a single file; in watch mode every output gets "
+            "its exports next to it."
+        )
+        args.export = [value.partition("=")[0] for value in args.export]
+    map_files = {Path(resolve_viseme_map(args, audio)) for audio in (False, True)}
+
+    seen: dict[Path, tuple[float, int]] = {}
+    known: dict[Path, tuple[float, int, bool]] = {}
+    pending: dict[str, tuple[Future[None], dict[str, str]]] = {}
+    failed: dict[str, dict[str, str]] = {}
+    logging.info(f"Watching {directory} (Ctrl+C to stop).")
+
+    with (
+        phoneme_cache.SharedPhonemeCache.create() as cache,
+        ProcessPoolExecutor(
+            max_workers=args.jobs,
+            initializer=_init_watch_worker,
+            initargs=(args, cache.handle),
+        ) as executor,
+    ):
+        try:
+            while True:
+                changed = False
+                for output, (future, deps) in list(pending.items()):
+                    if not future.done():
+                        continue
+                    del pending[output]
+                    # Inputs may have changed while it was running
+                    changed = True
+                    if future.exception() is not None:
+                        logging.error(
+                            f"Failed to generate {output}: {future.exception()}"
+                        )
+                        failed[output] = deps
+                        continue
+                    manifest[output] = deps
+                    with open(manifest_path, "w", encoding="utf-8") as f:
+                        json.dump(manifest, f, indent=2)
+
+                now = time.time()
+                for path in find_watch_inputs(directory, known) + sorted(map_files):
+                    stat = path.stat()
+                    changed |= seen.get(path) != (stat.st_mtime, stat.st_size)
+                    seen[path] = (stat.st_mtime, stat.st_size)
+                    if now - stat.st_mtime < args.debounce_seconds:
+                        # Still being written; look again on the next poll
+                        seen.pop(path)
+
+                if changed:
+                    for input_path in find_watch_inputs(directory, known):
+                        if input_path not in seen:
+                            continue
+                        output_path = watch_output(input_path)
+                        output = output_path.name
+                        deps = watch_dependencies(input_path, args)
+                        if output in pending or deps in (
+                            manifest.get(output),
+                            failed.get(output),
+                        ):
+                            continue
+                        logging.info(f"Regenerating {output_path}")
+                        future = executor.submit(
+                            generate, str(input_path), str(output_path), args
+                        )
+                        pending[output] = (future, deps)
+
+                time.sleep(args.watch_interval)
+        except KeyboardInterrupt:
+            logging.info("Stopped watching.")
+            executor.shutdown(cancel_futures=True)
+            phoneme_cache.log_counters(cache)
+
+
+def main():
+    args = setup_argparse()
+
+    if args.input_file:
+        logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+
+        apply_args(args)
 
+        if args.build_lexicon:
+            if not args.lexicon:
+                logging.error("--build-lexicon needs a --lexicon file to write.")
+                return
+            build_lexicon(args.input_file, args.lexicon, args.language)
+        elif args.watch:
+            watch(Path(args.input_file), args)
         else:
-            # Existing Whisper/Json mode
-            viseme_map = read_viseme_map(args.viseme_map)
-            words, words_only_text = get_words_data(args.input_file)
-            phonemes = get_phonemes(words_only_text, args.language)
-            frame_data = calc_frame_data(words, phonemes, viseme_map, args.stats)
-            write_to_file(args.output, frame_data)
+            generate(args.input_file, args.output, args)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,156 @@
+"""
+Phoneme cache shared between worker processes.
+
+The table lives in a multiprocessing.shared_memory block:
+
+    header   <QQQ   used bytes, hits, misses
+    entries  <II    key length, value length, then key and value bytes
+
+Entries are only ever appended. Appends and counter updates take a lock;
+lookups don't. Each process keeps its own index and extends it by parsing
+entries up to the `used` offset, which is only advanced once an entry has
+been written completely.
+"""
+
+import json
+import logging
+import struct
+import sys
+from collections.abc import Callable
+from multiprocessing import Lock
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any
+
+HEADER = struct.Struct("<QQQ")
+ENTRY = struct.Struct("<II")
+DEFAULT_SIZE = 64 << 20
+
+# The cache this process consults, set by `attach` in pool initializers
+active: "SharedPhonemeCache | None" = None
+
+
+class SharedPhonemeCache:
+    def __init__(self, shm: SharedMemory, lock: Any, owner: bool):
+        buf = shm.buf
+        assert buf is not None
+        self.shm = shm
+        self.buf = buf
+        self.lock = lock
+        self.owner = owner
+        self.index: dict[bytes, Any] = {}
+        self.scanned = HEADER.size
+        self.full = False
+
+    @classmethod
+    def create(cls, size: int = DEFAULT_SIZE) -> "SharedPhonemeCache":
+        cache = cls(SharedMemory(create=True, size=size), Lock(), owner=True)
+        HEADER.pack_into(cache.buf, 0, HEADER.size, 0, 0)
+        return cache
+
+    @classmethod
+    def open(cls, handle: tuple[str, Any]) -> "SharedPhonemeCache":
+        name, lock = handle
+        if sys.version_info >= (3, 13):
+            shm = SharedMemory(name=name, track=False)
+        else:
+            # Registers the block again, with the resource tracker it
+            # shares with the creating process. Harmless.
+            shm = SharedMemory(name=name)
+        return cls(shm, lock, owner=False)
+
+    @property
+    def handle(self) -> tuple[str, Any]:
+        """What a worker process needs to `attach` to this cache."""
+        return (self.shm.name, self.lock)
+
+    def counters(self) -> tuple[int, int]:
+        """Total (hits, misses) over all processes."""
+        _, hits, misses = HEADER.unpack_from(self.buf, 0)
+        return hits, misses
+
+    def _refresh(self) -> None:
+        buf = self.buf
+        used = HEADER.unpack_from(buf, 0)[0]
+        offset = self.scanned
+        while offset < used:
+            key_len, value_len = ENTRY.unpack_from(buf, offset)
+            offset += ENTRY.size
+            key = bytes(buf[offset : offset + key_len])
+            offset += key_len
+            self.index[key] = json.loads(bytes(buf[offset : offset + value_len]))
+            offset += value_len
+        self.scanned = offset
+
+    def _append(self, items: list[tuple[bytes, bytes]], hits: int, misses: int) -> None:
+        with self.lock:
+            buf = self.buf
+            used, total_hits, total_misses = HEADER.unpack_from(buf, 0)
+            for key, value in items:
+                end = used + ENTRY.size + len(key) + len(value)
+                if end > len(buf):
+                    if not self.full:
+                        logging.warning("Phoneme cache is full.")
+                        self.full = True
+                    break
+                ENTRY.pack_into(buf, used, len(key), len(value))
+                used += ENTRY.size
+                buf[used : used + len(key)] = key
+                used += len(key)
+                buf[used:end] = value
+                used = end
+            HEADER.pack_into(buf, 0, used, total_hits + hits, total_misses + misses)
+
+    def get_phonemes(
+        self,
+        words_only_text: list[str],
+        language: str,
+        phonemize: Callable[[list[str], str], list[Any]],
+    ) -> list[Any]:
+        """Look words up, and phonemize only the distinct ones nobody has
+        phonemized yet, in a single `phonemize` call."""
+        self._refresh()
+
+        keys = [f"{language}\0{text}".encode() for text in words_only_text]
+        missing = {
+            key: text
+            for key, text in zip(keys, words_only_text)
+            if key not in self.index
+        }
+
+        items: list[tuple[bytes, bytes]] = []
+        if missing:
+            results = phonemize(list(missing.values()), language)
+            for key, phoneme_data in zip(missing, results):
+                self.index[key] = phoneme_data
+                items.append((key, json.dumps(phoneme_data).encode()))
+
+        self._append(items, len(keys) - len(missing), len(missing))
+
+        return [self.index[key] for key in keys]
+
+    def close(self) -> None:
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    def __enter__(self) -> "SharedPhonemeCache":
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
+
+
+def attach(handle: tuple[str, Any] | None) -> None:
+    """Pool initializer: make `get_phonemes` in this process use the cache."""
+    global active
+    active = SharedPhonemeCache.open(handle) if handle is not None else None
+
+
+def log_counters(cache: SharedPhonemeCache) -> None:
+    hits, misses = cache.counters()
+    total = hits + misses
+    if total:
+        logging.info(
+            f"Phoneme cache: {hits} hits, {misses} misses, "
+            f"{hits / total:.0%} of phonemizer lookups avoided."
+        )
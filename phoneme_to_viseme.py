@@ -98,8 +98,8 @@ phoneme_to_viseme_arkit_v2 = {
     "w": "ou",
 }
 
-visemes_priority = {"sil": 0, "pp": 1, "th": 2}
-UNSKIPPABLE_VISEMES = ["sil", "pp", "th", "ff"]
+visemes_priority = {"sli": 0, "sil": 0, "pp": 1, "ff": 2, "th": 2}
+UNSKIPPABLE_VISEMES = ["sli", "sil", "pp", "th", "ff"]
 
 
 def get_viseme_priority(viseme: str) -> int:
@@ -108,6 +108,25 @@ def get_viseme_priority(viseme: str) -> int:
         return 999  # Lowest priority for invalid visemes
 
     try:
-        return getattr(visemes_priority, viseme.lower(), 999)
+        return visemes_priority.get(viseme.lower(), 999)
     except (AttributeError, TypeError):
         return 999  # Default to lowest priority on any error
+
+
+def is_unskippable(viseme: str) -> bool:
+    """Closures and silences must never be dropped to satisfy a minimum hold."""
+    return isinstance(viseme, str) and viseme.lower() in UNSKIPPABLE_VISEMES
+
+
+# Rhubarb mouth shapes by the viseme they look most like
+rhubarb_to_viseme = {
+    "A": "PP",  # Closed mouth: M, B, P
+    "B": "DD",  # Slightly open, clenched teeth: most consonants
+    "C": "E",  # Open: EH, AE
+    "D": "aa",  # Wide open: AA
+    "E": "oh",  # Slightly rounded: AO, ER
+    "F": "ou",  # Puckered: UW, OW, W
+    "G": "FF",  # Upper teeth on lower lip: F, V
+    "H": "nn",  # Tongue raised: L
+    "X": "sil",  # Idle
+}
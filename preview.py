@@ -0,0 +1,323 @@
+# pyright: reportAny=false, reportUnusedCallResult=false
+"""Render a frame data file into a preview without Blender.
+
+The mouth textures are named after viseme ids (`5.png`, `6.png`, ...).
+Each one is composited onto the background once with NumPy; frames are
+then just the composited image of the viseme showing on that frame.
+
+Usage:
+    python preview.py output.txt mouths/ -o preview.gif --audio audio.wav
+    python preview.py output.txt mouths/ -o frames/ --background face.png
+
+A `<output>.timing.json` sidecar records the frame rate, frame count and
+keyframe times to line the preview up with the audio.
+
+Needs NumPy. Pillow is optional: without it, textures and backgrounds
+must be binary PPM/PGM or .npy files, and frames are written as PPM.
+The `preview` extra installs both.
+"""
+
+import argparse
+import io
+import json
+import logging
+import time
+import wave
+from pathlib import Path
+
+import numpy as np
+
+from timeline import Timeline
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+ANIMATED_SUFFIXES = {".gif", ".webp", ".png"}
+DEFAULT_FRAME_RATE = 30
+
+
+def read_ppm(filename: Path) -> np.ndarray:
+    data = filename.read_bytes()
+    fields: list[bytes] = []
+    offset = 0
+    while len(fields) < 4:
+        while data[offset : offset + 1].isspace():
+            offset += 1
+        if data[offset : offset + 1] == b"#":
+            offset = data.index(b"\n", offset) + 1
+            continue
+        end = offset
+        while not data[end : end + 1].isspace():
+            end += 1
+        fields.append(data[offset:end])
+        offset = end
+    magic, width, height, maxval = fields
+    if magic not in (b"P5", b"P6") or int(maxval) > 255:
+        raise ValueError(f"{filename}: only 8-bit binary PPM/PGM is supported.")
+
+    channels = 3 if magic == b"P6" else 1
+    pixels = np.frombuffer(data, np.uint8, offset=offset + 1)
+    return pixels[: int(width) * int(height) * channels].reshape(
+        int(height), int(width), channels
+    )
+
+
+def read_image(filename: Path) -> np.ndarray:
+    """An image as an (height, width, 4) uint8 RGBA array."""
+    if filename.suffix.lower() == ".npy":
+        pixels = np.load(filename)
+    elif filename.suffix.lower() in (".ppm", ".pgm"):
+        pixels = read_ppm(filename)
+    elif Image is not None:
+        with Image.open(filename) as image:
+            pixels = np.asarray(image.convert("RGBA"))
+    else:
+        raise ValueError(f"{filename}: install Pillow, or use PPM/PGM/.npy files.")
+
+    if pixels.ndim == 2:
+        pixels = pixels[:, :, None]
+    if pixels.shape[2] in (1, 2):  # Gray, gray + alpha
+        pixels = np.concatenate(
+            [np.repeat(pixels[:, :, :1], 3, axis=2), pixels[:, :, 1:]], axis=2
+        )
+    if pixels.shape[2] == 3:
+        alpha = np.full(pixels.shape[:2] + (1,), 255, np.uint8)
+        pixels = np.concatenate([pixels, alpha], axis=2)
+
+    return pixels.astype(np.uint8)
+
+
+def load_textures(directory: Path) -> dict[int, np.ndarray]:
+    textures: dict[int, np.ndarray] = {}
+    for path in sorted(directory.iterdir()):
+        if path.is_file() and path.stem.isdigit():
+            textures[int(path.stem)] = read_image(path)
+
+    return textures
+
+
+def composite(
+    textures: dict[int, np.ndarray],
+    background: np.ndarray,
+    position: tuple[int, int],
+) -> tuple[np.ndarray, dict[int, int]]:
+    """Every texture alpha-blended onto the background at `position`.
+
+    Returns an (n + 1, height, width, 3) stack, the background alone first,
+    and each viseme id's index in it.
+    """
+    x, y = position
+    canvas = background[:, :, :3].astype(np.float32)
+    stack = np.empty((len(textures) + 1,) + canvas.shape, np.uint8)
+    stack[0] = background[:, :, :3]
+    index: dict[int, int] = {}
+
+    for i, (viseme_id, texture) in enumerate(sorted(textures.items()), start=1):
+        # Clip the texture to the canvas
+        top, left = max(y, 0), max(x, 0)
+        bottom = min(y + texture.shape[0], canvas.shape[0])
+        right = min(x + texture.shape[1], canvas.shape[1])
+        layer = canvas.copy()
+        if bottom > top and right > left:
+            part = texture[top - y : bottom - y, left - x : right - x]
+            alpha = part[:, :, 3:].astype(np.float32) / 255
+            region = layer[top:bottom, left:right]
+            region[:] = region * (1 - alpha) + part[:, :, :3] * alpha
+        stack[i] = np.rint(layer).astype(np.uint8)
+        index[viseme_id] = i
+
+    return stack, index
+
+
+def frame_indices(
+    timeline: Timeline, index: dict[int, int], frame_count: int
+) -> np.ndarray:
+    """Index into the composited stack for every frame; 0 (background
+    alone) before the first keyframe."""
+    frames = np.asarray(timeline.frames, np.int64)
+    ids = np.asarray(timeline.ids, np.int64)
+    missing = sorted(set(ids.tolist()) - set(index))
+    if missing:
+        raise ValueError(f"No texture for viseme ids: {', '.join(map(str, missing))}")
+
+    lookup = np.zeros(max(index, default=0) + 1, np.int64)
+    for viseme_id, i in index.items():
+        lookup[viseme_id] = i
+    keyframe_index = np.concatenate([[0], lookup[ids]])
+    showing = np.searchsorted(frames, np.arange(frame_count), side="right")
+    return keyframe_index[showing]
+
+
+def encode_ppm(pixels: np.ndarray) -> bytes:
+    height, width = pixels.shape[:2]
+    return f"P6\n{width} {height}\n255\n".encode() + pixels.tobytes()
+
+
+def write_frames(stack: np.ndarray, indices: np.ndarray, directory: Path) -> None:
+    """A numbered image per frame. Each distinct image is encoded once."""
+    directory.mkdir(parents=True, exist_ok=True)
+    suffix = ".png" if Image is not None else ".ppm"
+    encoded: dict[int, bytes] = {}
+    for i in np.unique(indices).tolist():
+        if Image is None:
+            encoded[i] = encode_ppm(stack[i])
+        else:
+            buffer = io.BytesIO()
+            Image.fromarray(stack[i]).save(buffer, format="PNG")
+            encoded[i] = buffer.getvalue()
+
+    for frame_num, i in enumerate(indices.tolist()):
+        (directory / f"frame_{frame_num:05d}{suffix}").write_bytes(encoded[i])
+
+
+def frame_durations(count: int, frame_rate: int, step: int) -> list[int]:
+    """Per-frame display times in ms, multiples of `step`, that add up to
+    frame i starting at i / frame_rate seconds, rounded to `step`. GIF
+    stores delays in 10 ms units, so 30 fps alternates 30 and 40 ms."""
+    starts = [step * round(i * 1000 / (frame_rate * step)) for i in range(count + 1)]
+    return [end - start for start, end in zip(starts, starts[1:])]
+
+
+def write_animation(
+    stack: np.ndarray, indices: np.ndarray, filename: Path, frame_rate: int
+) -> None:
+    if Image is None:
+        raise ValueError("Animated output needs Pillow. Use a directory instead.")
+
+    images = {i: Image.fromarray(stack[i]) for i in np.unique(indices).tolist()}
+    frames = [images[i] for i in indices.tolist()]
+    step = 10 if filename.suffix.lower() == ".gif" else 1
+    durations = frame_durations(len(frames), frame_rate, step)
+    if step == 10 and min(durations) < 20:
+        logging.warning(
+            f"{frame_rate} fps needs GIF delays under 20 ms, which most "
+            "players slow down. Use .webp or .png instead."
+        )
+    frames[0].save(
+        filename,
+        save_all=True,
+        append_images=frames[1:],
+        duration=durations,
+        loop=0,
+    )
+
+
+def audio_duration(filename: str) -> float | None:
+    try:
+        with wave.open(filename, "rb") as f:
+            return f.getnframes() / f.getframerate()
+    except (wave.Error, EOFError):
+        return None
+
+
+def write_timing(
+    filename: Path,
+    timeline: Timeline,
+    frame_count: int,
+    audio: str | None,
+) -> None:
+    frame_rate = timeline.frame_rate
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "frame_rate": frame_rate,
+                "frames": frame_count,
+                "duration": round(frame_count / frame_rate, 4),
+                "audio": audio,
+                "audio_offset": 0.0,
+                "keyframes": [
+                    {"frame": frame, "time": round(frame / frame_rate, 4), "viseme": v}
+                    for frame, v in zip(timeline.frames, timeline.ids)
+                ],
+            },
+            f,
+            indent=2,
+        )
+
+
+def preview(args: argparse.Namespace) -> None:
+    start = time.perf_counter()
+
+    with open(args.frame_data, encoding="utf-8") as f:
+        timeline = Timeline.from_frame_data(f.read(), args.frame)
+    textures = load_textures(Path(args.textures))
+    if not textures:
+        raise ValueError(f"No <viseme id>.<ext> textures in {args.textures}.")
+
+    height, width = next(iter(textures.values())).shape[:2]
+    if args.background:
+        background = read_image(Path(args.background))
+    else:
+        color = bytes.fromhex(args.background_color.lstrip("#"))
+        background = np.empty((height, width, 4), np.uint8)
+        background[:, :] = list(color[:3]) + [255]
+    if args.position:
+        position = (args.position[0], args.position[1])
+    else:
+        position = (
+            (background.shape[1] - width) // 2,
+            (background.shape[0] - height) // 2,
+        )
+
+    duration = audio_duration(args.audio) if args.audio else None
+    if duration is not None:
+        frame_count = round(duration * args.frame)
+    else:
+        last = timeline.frames[-1] if len(timeline) else 0
+        frame_count = last + args.frame  # Hold the last keyframe for a second
+
+    stack, index = composite(textures, background, position)
+    indices = frame_indices(timeline, index, frame_count)
+
+    output = Path(args.output)
+    if output.suffix.lower() in ANIMATED_SUFFIXES:
+        write_animation(stack, indices, output, args.frame)
+    else:
+        write_frames(stack, indices, output)
+    timing = output.with_name(output.name + ".timing.json")
+    write_timing(timing, timeline, frame_count, args.audio)
+
+    elapsed = time.perf_counter() - start
+    seconds = frame_count / args.frame
+    print(
+        f"Rendered {frame_count} frames ({seconds:.1f}s) to {output} in "
+        f"{elapsed:.2f}s, {seconds / elapsed:.0f}x real time. Timing: {timing}"
+    )
+
+
+def setup_argparse() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Preview a lip sync track.")
+    parser.add_argument("frame_data", help="Frame data file written by main.py.")
+    parser.add_argument("textures", help="Directory of <viseme id>.<ext> images.")
+    parser.add_argument(
+        "--output",
+        "-o",
+        default="preview.gif",
+        help="Animated .gif/.webp/.png, or a directory for a frame sequence.",
+    )
+    parser.add_argument("--frame", "-f", default=DEFAULT_FRAME_RATE, type=int)
+    parser.add_argument(
+        "--audio", "-a", help="The clip's audio. A WAV sets the preview length."
+    )
+    parser.add_argument("--background", "-b", help="Image to draw the mouth on.")
+    parser.add_argument(
+        "--background-color",
+        default="#ffffff",
+        help="Background without --background.",
+    )
+    parser.add_argument(
+        "--position",
+        nargs=2,
+        type=int,
+        metavar=("X", "Y"),
+        help="Top left corner of the mouth on the background. Default is centered.",
+    )
+
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s: %(message)s")
+    preview(setup_argparse())
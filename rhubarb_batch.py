@@ -0,0 +1,219 @@
+# pyright: reportAny=false, reportUnusedCallResult=false
+"""Run Rhubarb over many audio files with a bounded number of processes.
+
+Every file gets its own temporary TSV, a per-attempt timeout and a few
+retries. A Rhubarb that times out, or is still running when the batch is
+cancelled (Ctrl-C, SIGTERM), is killed. Progress goes to stderr.
+
+Usage:
+    python rhubarb_batch.py shots/*.wav -j 4 --timeout 600
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import main
+
+POSIX = sys.platform != "win32"
+
+
+@dataclass
+class Progress:
+    total: int
+    done: int = 0
+    failed: list[str] = field(default_factory=list)
+    start: float = field(default_factory=time.perf_counter)
+
+    def report(self, audio_file: str, ok: bool, elapsed: float) -> None:
+        self.done += 1
+        if not ok:
+            self.failed.append(audio_file)
+        wall = time.perf_counter() - self.start
+        logging.info(
+            f"[{self.done}/{self.total}] {audio_file} "
+            f"{'done' if ok else 'FAILED'} in {elapsed:.1f}s | "
+            f"{self.done / wall:.2f} files/s, {len(self.failed)} failed"
+        )
+
+
+def kill(proc: asyncio.subprocess.Process) -> None:
+    try:
+        if POSIX:
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+    except ProcessLookupError:
+        pass
+
+
+async def run_rhubarb(audio_file: str, output_file: str, timeout: float) -> bool:
+    """One Rhubarb attempt. The process is killed on timeout or cancellation."""
+    proc = await asyncio.create_subprocess_exec(
+        *main.rhubarb_command(audio_file, output_file),
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE,
+        # Its own process group, so kill() also reaches anything it started
+        start_new_session=POSIX,
+    )
+    try:
+        _, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+    except asyncio.TimeoutError:
+        logging.warning(f"Rhubarb timed out after {timeout}s on {audio_file}.")
+        return False
+    finally:
+        if proc.returncode is None:
+            kill(proc)
+            await proc.wait()
+
+    if proc.returncode != 0:
+        logging.warning(f"Rhubarb failed on {audio_file}: {stderr.decode().strip()}")
+        return False
+
+    return True
+
+
+async def run_with_retries(
+    audio_file: str, output_file: str, args: argparse.Namespace
+) -> bool:
+    for attempt in range(1 + args.retries):
+        if attempt:
+            logging.info(f"Retrying {audio_file} ({attempt}/{args.retries}).")
+        if await run_rhubarb(audio_file, output_file, args.timeout):
+            return True
+
+    return False
+
+
+async def process_file(
+    audio_file: str,
+    output_file: str,
+    viseme_map: dict[str, int],
+    args: argparse.Namespace,
+    tmp_dir: str,
+    slots: asyncio.Semaphore,
+    progress: Progress,
+) -> None:
+    async with slots:
+        start = time.perf_counter()
+        stem = Path(audio_file).stem
+        fd, tsv = tempfile.mkstemp(prefix=f"{stem}-", suffix=".tsv", dir=tmp_dir)
+        os.close(fd)
+
+        try:
+            rhubarb_input = audio_file
+            if Path(audio_file).suffix.lower() == ".wav" and not args.no_preprocess:
+                fd, mono_wav = tempfile.mkstemp(
+                    prefix=f"{stem}-", suffix=".wav", dir=tmp_dir
+                )
+                os.close(fd)
+                if await asyncio.to_thread(main.preprocess_audio, audio_file, mono_wav):
+                    rhubarb_input = mono_wav
+
+            ok = await run_with_retries(rhubarb_input, tsv, args)
+            if ok:
+                keyframes = main.rhubarb_keyframes(
+                    tsv,
+                    viseme_map,
+                    min_gap=args.min_gap_seconds,
+                    max_duration=args.max_duration_seconds,
+                    frame_rate=args.frame,
+                )
+                main.write_to_file(output_file, keyframes, [])
+        except Exception as e:
+            logging.error(f"{audio_file}: {e}")
+            ok = False
+
+        progress.report(audio_file, ok, time.perf_counter() - start)
+
+
+async def run_batch(args: argparse.Namespace) -> Progress:
+    main.check_rhubarb()
+    main.frame = args.frame
+    viseme_map = main.read_viseme_map(main.resolve_viseme_map(args, audio=True))
+
+    task = asyncio.current_task()
+    if task is not None and POSIX:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, task.cancel)
+
+    progress = Progress(len(args.audio_files))
+    slots = asyncio.Semaphore(args.jobs or os.cpu_count() or 1)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        jobs = []
+        for audio_file in args.audio_files:
+            output_file = main.watch_output(Path(audio_file))
+            if args.output_dir:
+                output_file = Path(args.output_dir) / output_file.name
+            jobs.append(
+                process_file(
+                    audio_file,
+                    str(output_file),
+                    viseme_map,
+                    args,
+                    tmp_dir,
+                    slots,
+                    progress,
+                )
+            )
+        await asyncio.gather(*jobs)
+
+    wall = time.perf_counter() - progress.start
+    logging.info(
+        f"Processed {progress.total} files in {wall:.1f}s "
+        f"({progress.total / wall:.2f} files/s), {len(progress.failed)} failed."
+    )
+    return progress
+
+
+def setup_argparse() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run Rhubarb over many audio files.")
+    parser.add_argument("audio_files", nargs="+", help="WAV or OGG files.")
+    parser.add_argument(
+        "--output-dir",
+        "-o",
+        help="Where to write <name>.rhubarb.txt. Default is next to each input.",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        help="Concurrent Rhubarb processes. Default is the number of CPUs.",
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=600, help="Seconds per Rhubarb attempt."
+    )
+    parser.add_argument(
+        "--retries", type=int, default=1, help="Attempts after a timeout or failure."
+    )
+    parser.add_argument("--frame", "-f", default=main.frame, type=int)
+    parser.add_argument(
+        "--min-gap-seconds", "-g", default=main.min_gap_seconds, type=float
+    )
+    parser.add_argument(
+        "--max-duration-seconds", default=main.max_duration_seconds, type=float
+    )
+    parser.add_argument("--viseme_map", "-m", default="viseme_map.json")
+    parser.add_argument(
+        "--no-preprocess",
+        help="Pass .wav files to Rhubarb unchanged.",
+        action="store_true",
+    )
+
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    try:
+        progress = asyncio.run(run_batch(setup_argparse()))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        logging.error("Cancelled. Running Rhubarb processes were killed.")
+        sys.exit(130)
+    sys.exit(1 if progress.failed else 0)
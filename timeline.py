@@ -0,0 +1,132 @@
+"""
+Indexed viseme timeline for "which mouth shape is active at frame f" lookups.
+
+A Timeline keeps the keyframes as two sorted arrays, frames and viseme ids.
+Point queries are a bisect, range queries a slice. Saved timelines are
+read back through mmap, so loading doesn't parse anything:
+
+    header   <4sHHIi   magic, version, byte order, keyframe count, frame rate
+    frames   int32 * count
+    ids      int32 * count
+"""
+
+import mmap
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Sequence
+
+MAGIC = b"LSTL"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIi")
+LITTLE, BIG = 0, 1
+
+
+class Timeline:
+    def __init__(self, frames: Sequence[int], ids: Sequence[int], frame_rate: int):
+        self.frames = frames
+        self.ids = ids
+        self.frame_rate = frame_rate
+        self._mmap: mmap.mmap | None = None
+        self._views: list[memoryview] = []
+
+    @classmethod
+    def from_keyframes(
+        cls, keyframes: Sequence[tuple[int, int]], frame_rate: int
+    ) -> "Timeline":
+        # Stable, so of keyframes on the same frame the later one wins
+        keyframes = sorted(keyframes, key=lambda k: k[0])
+        return cls(
+            array("i", [f for f, _ in keyframes]),
+            array("i", [v for _, v in keyframes]),
+            frame_rate,
+        )
+
+    @classmethod
+    def from_frame_data(cls, frame_data: str, frame_rate: int) -> "Timeline":
+        """Build from the text calc_frame_data and process_rhubarb_output return."""
+        keyframes: list[tuple[int, int]] = []
+        for line in frame_data.splitlines():
+            parts = line.split()
+            if len(parts) >= 2:
+                keyframes.append((int(parts[0]), int(parts[1])))
+
+        return cls.from_keyframes(keyframes, frame_rate)
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    def at_frame(self, frame: int) -> int | None:
+        """Viseme id showing on `frame`, or None before the first keyframe."""
+        index = bisect_right(self.frames, frame) - 1
+        return self.ids[index] if index >= 0 else None
+
+    def at_time(self, seconds: float) -> int | None:
+        """Viseme id showing at `seconds`, or None before the first keyframe."""
+        return self.at_frame(int(seconds * self.frame_rate))
+
+    def between(self, start: int, end: int) -> list[tuple[int, int]]:
+        """(frame, id) keyframes that show during frames [start, end).
+
+        The first one is the keyframe already active at `start`, so its
+        frame may be earlier than `start`.
+        """
+        lo = max(0, bisect_right(self.frames, start) - 1)
+        hi = bisect_left(self.frames, end)
+        return list(zip(self.frames[lo:hi], self.ids[lo:hi]))
+
+    def save(self, filename: str) -> None:
+        byte_order = LITTLE if sys.byteorder == "little" else BIG
+        with open(filename, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, byte_order, len(self), self.frame_rate))
+            array("i", self.frames).tofile(f)
+            array("i", self.ids).tofile(f)
+
+    @classmethod
+    def load(cls, filename: str) -> "Timeline":
+        """Map a saved timeline. Lookups read straight from the file."""
+        with open(filename, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, byte_order, count, frame_rate = HEADER.unpack_from(mm, 0)
+        if magic != MAGIC or version != VERSION:
+            mm.close()
+            raise ValueError(f"{filename} is not a version {VERSION} timeline file.")
+
+        size = array("i").itemsize * count
+        view = memoryview(mm)
+        frames = view[HEADER.size : HEADER.size + size]
+        ids = view[HEADER.size + size : HEADER.size + 2 * size]
+
+        if byte_order != (LITTLE if sys.byteorder == "little" else BIG):
+            # Written on another machine; swap into memory instead
+            frames_array, ids_array = array("i"), array("i")
+            frames_array.frombytes(frames)
+            ids_array.frombytes(ids)
+            frames_array.byteswap()
+            ids_array.byteswap()
+            for v in (frames, ids, view):
+                v.release()
+            mm.close()
+            return cls(frames_array, ids_array, frame_rate)
+
+        frames_view, ids_view = frames.cast("i"), ids.cast("i")
+        timeline = cls(frames_view, ids_view, frame_rate)
+        timeline._mmap = mm
+        timeline._views = [frames_view, ids_view, frames, ids, view]
+        return timeline
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            for view in self._views:
+                view.release()
+            self._views = []
+            self._mmap.close()
+            self._mmap = None
+
+    def __enter__(self) -> "Timeline":
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
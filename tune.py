@@ -0,0 +1,241 @@
+# pyright: reportAny=false, reportUnusedCallResult=false
+"""Tune the timing parameters against a hand-animated reference track.
+
+The input is phonemized (or run through Rhubarb) once. Every parameter
+candidate is then placed from that cached data on a process pool and
+scored by the share of frames showing the same viseme as the reference.
+
+Usage:
+    python tune.py audio.json --reference hand_animated.txt -l zh
+    python tune.py audio.wav --reference hand_animated.txt --random 200
+
+For Whisper JSON the tuned parameters are --min-gap-seconds and
+--silence-seconds; for audio, --min-gap-seconds and --max-duration-seconds.
+Pass the viseme map the reference was animated with as -m, or the ids
+won't match.
+"""
+
+import argparse
+import itertools
+import logging
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any
+
+import main
+from timeline import Timeline
+
+# Set in each worker by _init_worker
+cached: Any = None
+viseme_map: dict[str, int] = {}
+audio = False
+
+
+def _init_worker(
+    cached_: Any, viseme_map_: dict[str, int], audio_: bool, frame_rate: int
+) -> None:
+    global cached, viseme_map, audio
+    cached, viseme_map, audio = cached_, viseme_map_, audio_
+    main.frame = frame_rate
+
+
+def place(min_gap: float, silence: float, max_duration: float) -> list[tuple[int, int]]:
+    if audio:
+        return main.rhubarb_events_to_keyframes(
+            cached, viseme_map, min_gap, max_duration, main.frame
+        )
+
+    words, phonemes = cached
+    main.min_hold_frames = max(1, round(min_gap * main.frame))
+    main.silence_seconds = silence
+    return main.calc_keyframes(words, phonemes, viseme_map, False)
+
+
+def per_frame(keyframes: list[tuple[int, int]], length: int) -> list[int]:
+    """The viseme id showing on each frame, -1 before the first keyframe."""
+    ids = [-1] * length
+    ends = [f for f, _ in keyframes[1:]] + [length]
+    for (start, viseme_id), end in zip(keyframes, ends):
+        start, end = max(start, 0), min(end, length)
+        if end > start:
+            ids[start:end] = [viseme_id] * (end - start)
+
+    return ids
+
+
+def evaluate(
+    params: tuple[float, float, float], reference: list[int]
+) -> tuple[tuple[float, float, float], float, float]:
+    """(params, frame-wise agreement with `reference`, seconds taken)."""
+    start = time.perf_counter()
+    candidate = per_frame(place(*params), len(reference))
+    score = sum(a == b for a, b in zip(candidate, reference)) / len(reference)
+    return params, score, time.perf_counter() - start
+
+
+def load_cached(args: argparse.Namespace, audio: bool) -> Any:
+    """Phonemes or Rhubarb events for the input, computed once."""
+    if not audio:
+        words, words_only_text = main.get_words_data(args.input_file)
+        phonemes = main.get_phonemes(
+            words_only_text, args.language, main.phrase_starts(words)
+        )
+        return words, phonemes
+
+    suffix = Path(args.input_file).suffix.lower()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        rhubarb_input = args.input_file
+        mono_wav = os.path.join(tmp_dir, "mono.wav")
+        if suffix == ".wav" and main.preprocess_audio(args.input_file, mono_wav):
+            rhubarb_input = mono_wav
+        tsv = os.path.join(tmp_dir, "rhubarb.tsv")
+        main.run_rhubarb(rhubarb_input, tsv)
+        return main.read_rhubarb_events(tsv)
+
+
+def candidates(
+    args: argparse.Namespace, audio: bool
+) -> list[tuple[float, float, float]]:
+    """(min gap, silence, max duration) triples: the full grid, or
+    `--random` samples from the ranges the grid spans."""
+    min_gaps: list[float] = args.min_gap
+    silences: list[float] = [main.silence_seconds] if audio else args.silence
+    max_durations: list[float] = (
+        args.max_duration if audio else [main.max_duration_seconds]
+    )
+
+    if not args.random:
+        return [
+            (min_gap, silence, max_duration)
+            for min_gap in min_gaps
+            for silence in silences
+            for max_duration in max_durations
+        ]
+
+    rng = random.Random(args.seed)
+
+    def sample(axis: list[float]) -> float:
+        return round(rng.uniform(min(axis), max(axis)), 4)
+
+    return [
+        (sample(min_gaps), sample(silences), sample(max_durations))
+        for _ in range(args.random)
+    ]
+
+
+def tune(args: argparse.Namespace) -> None:
+    main.frame = args.frame
+    audio = Path(args.input_file).suffix.lower() in main.AUDIO_SUFFIXES
+    viseme_map = main.read_viseme_map(main.resolve_viseme_map(args, audio))
+
+    start = time.perf_counter()
+    cached = load_cached(args, audio)
+    print(f"Prepared input in {time.perf_counter() - start:.2f}s")
+
+    with open(args.reference, encoding="utf-8") as f:
+        reference_timeline = Timeline.from_frame_data(f.read(), args.frame)
+    reference_keyframes = list(zip(reference_timeline.frames, reference_timeline.ids))
+    # Score past the last reference keyframe so a trailing hold counts
+    length = reference_keyframes[-1][0] + args.frame if reference_keyframes else 0
+    if length == 0:
+        print("The reference track has no keyframes.")
+        return
+    reference = per_frame(reference_keyframes, length)
+    unknown = set(reference_timeline.ids) - set(viseme_map.values())
+    if unknown:
+        logging.warning(
+            f"The reference uses viseme ids {sorted(unknown)} that the "
+            "viseme map doesn't. Pass the map it was animated with as -m."
+        )
+
+    params = candidates(args, audio)
+    jobs = args.jobs or os.cpu_count() or 1
+    start = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        initializer=_init_worker,
+        initargs=(cached, viseme_map, audio, args.frame),
+    ) as executor:
+        results = list(
+            executor.map(
+                evaluate,
+                params,
+                itertools.repeat(reference),
+                chunksize=max(1, len(params) // (4 * jobs)),
+            )
+        )
+    wall = time.perf_counter() - start
+
+    results.sort(key=lambda result: result[1], reverse=True)
+    print(f"{'min gap':>8} {'silence':>8} {'max dur':>8} {'agreement':>10}")
+    for (min_gap, silence, max_duration), score, _ in results[: args.top]:
+        print(f"{min_gap:>8} {silence:>8} {max_duration:>8} {score:>10.2%}")
+
+    mean = sum(elapsed for *_, elapsed in results) / len(results)
+    print(
+        f"{len(results)} evaluations in {wall:.2f}s on {jobs} processes: "
+        f"{mean * 1000:.1f}ms each, {wall / len(results) * 1000:.1f}ms wall time"
+    )
+
+    (min_gap, silence, max_duration), score, _ = results[0]
+    flags = f"--min-gap-seconds {min_gap} " + (
+        f"--max-duration-seconds {max_duration}"
+        if audio
+        else f"--silence-seconds {silence}"
+    )
+    print(f"Best ({score:.2%}): {flags}")
+
+
+def setup_argparse() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Search timing parameters that best match a reference track."
+    )
+    parser.add_argument("input_file", help="Whisper JSON or audio file.")
+    parser.add_argument(
+        "--reference", "-r", required=True, help="Hand-animated frame data to match."
+    )
+    parser.add_argument("--frame", "-f", default=main.frame, type=int)
+    parser.add_argument("--viseme_map", "-m", default="viseme_map.json")
+    parser.add_argument("--language", "-l", default="en")
+    parser.add_argument(
+        "--min-gap",
+        nargs="+",
+        type=float,
+        default=[0.025, 0.05, 0.075, 0.1, 0.125, 0.15],
+        help="--min-gap-seconds values to try.",
+    )
+    parser.add_argument(
+        "--silence",
+        nargs="+",
+        type=float,
+        default=[0.04, 0.08, 0.12, 0.16, 0.2, 0.3],
+        help="--silence-seconds values to try (Whisper JSON input).",
+    )
+    parser.add_argument(
+        "--max-duration",
+        nargs="+",
+        type=float,
+        default=[0, 0.2, 0.3, 0.5, 0.75, 1.0],
+        help="--max-duration-seconds values to try (audio input).",
+    )
+    parser.add_argument(
+        "--random",
+        type=int,
+        default=0,
+        help="Sample this many candidates from the value ranges instead of the grid.",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--jobs", "-j", type=int, help="Worker processes.")
+    parser.add_argument("--top", type=int, default=5, help="Candidates to list.")
+
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s: %(message)s")
+    tune(setup_argparse())